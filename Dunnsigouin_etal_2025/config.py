@@ -10,6 +10,7 @@ fig                  = proj + "fig/"
 raw                  = cf_space + "raw/"
 processed            = cf_space + "processed/cf-Dunnsigouin_etal_2025/"
 verify               = cf_space + "processed/cf-Dunnsigouin_etal_2025/verify/"
+zarr                 = cf_space + "processed/cf-Dunnsigouin_etal_2025/zarr/"
 
 s2s_forecast_6hourly                = raw + "s2s/mars/ecmwf/forecast/sfc/6hourly/"
 s2s_forecast_6hourly_student        = raw + "s2s/mars/ecmwf/forecast/sfc/6hourly_student/"
@@ -32,6 +33,7 @@ s2s_hindcast_weekly                 = processed + "s2s/ecmwf/hindcast/weekly/val
 era5_6hourly                         = raw + "era5/6hourly/"
 era5_daily                           = processed + "era5/continuous-format/daily/"
 era5_daily_student                   = processed + "era5/continuous-format/daily/student/"
+era5_daily_store                     = processed + "era5/continuous-format/daily/store/"
 era5_forecast_daily                  = processed + "era5/s2s-model-format/forecast/daily/values/"
 era5_forecast_daily_student          = processed + "era5/s2s-model-format/forecast/daily/student/values/"
 era5_forecast_daily_student_combined = processed + "era5/s2s-model-format/forecast/daily/student/combined/"
@@ -74,6 +76,7 @@ dirs = {"proj":proj,
         "era5_6hourly":era5_6hourly,
 	"era5_daily":era5_daily,
         "era5_daily_student":era5_daily_student,
+        "era5_daily_store":era5_daily_store,
         "era5_forecast_daily":era5_forecast_daily,
         "era5_forecast_daily_student":era5_forecast_daily_student,
         "era5_forecast_daily_student_combined":era5_forecast_daily_student_combined,
@@ -89,5 +92,19 @@ dirs = {"proj":proj,
         "era5_hindcast_daily_climatology":era5_hindcast_daily_climatology,
         "era5_hindcast_weekly_quantile":era5_hindcast_weekly_quantile,
         "era5_hindcast_weekly_climatology":era5_hindcast_weekly_climatology,        
-        "verify":verify
+        "verify":verify,
+        "zarr":zarr
 }        
+
+
+# netcdf chunk shape per product written with a box_size dimension. Dimensions not
+# listed are stored whole, so every chunk is one (latitude,longitude) map for one box
+# size and lead time, matching the .sel(box_size=...).isel(time=...) reads in verify.
+chunks = {"anomaly":{"box_size":1,"time":1},
+          "probability":{"box_size":1,"time":1},
+          "binary":{"box_size":1,"time":1}
+}
+
+# zarr chunk shape of the consolidated product stores (see store.py), one
+# initialization date and box size per chunk
+store_chunks = {"forecast_date":1,"box_size":1}
@@ -0,0 +1,107 @@
+"""
+Collection of functions for era5 data, in particular a memory-mappable
+store of the daily continuous era5 data. The store is a raw .npy array
+(time, latitude, longitude) in float32 per variable and grid with a
+.npz sidecar holding the date index, coordinates and attributes, so that
+any window of days is a zero-copy slice without decompressing yearly files.
+
+This store is separate from the zarr stores of store.py on purpose. The
+hindcast format gathers, for every forecast date, the same calendar days of
+20 earlier years, i.e. 20 scattered windows of up to 46 days, and the
+forecast format one window per date. From the memory map these are plain
+(fancy) indexing into pages shared through the OS page cache by all
+processes, with no per-day chunk lookups or decompression as from a zarr
+store chunked by day. It also keeps the preprocessing free of the optional
+zarr/dask dependencies, which are only needed for the product stores.
+"""
+
+import numpy    as np
+import xarray   as xr
+import pandas   as pd
+import json
+import os
+from Dunnsigouin_etal_2025 import config
+
+# opened stores, see open_era5_daily_store
+stores = {}
+
+
+def get_store_grid(grid):
+    """
+    The day1to46_0.5x0.5 grid uses the 0.5x0.5 era5 data.
+    """
+    if grid == 'day1to46_0.5x0.5': return '0.5x0.5'
+    else: return grid
+
+
+def get_store_filenames(variable, grid):
+    """
+    Returns filenames of the values (.npy) and index sidecar (.npz) of the
+    daily era5 store of variable on grid.
+    """
+    filename = config.dirs['era5_daily_store'] + variable + '/' + variable + '_' + get_store_grid(grid)
+    return filename + '.npy', filename + '_index.npz'
+
+
+def write_era5_daily_store(variable, grid, years):
+    """
+    One-time conversion of the yearly daily continuous era5 files of years
+    into the memory-mappable store. Years are read and written one at a
+    time so only one year is held in memory. Days must be continuous.
+    """
+    path_in      = config.dirs['era5_daily'] + variable + '/'
+    filenames_in = [path_in + variable + '_' + get_store_grid(grid) + '_' + str(year) + '.nc' for year in years]
+    filename_values, filename_index = get_store_filenames(variable, grid)
+    os.makedirs(os.path.dirname(filename_values), exist_ok=True)
+
+    # time index over all years from the files' metadata only
+    time = []
+    for filename_in in filenames_in:
+        with xr.open_dataset(filename_in) as ds: time.append(ds.time.values)
+    time = np.concatenate(time)
+    if np.any(np.diff(time.astype('datetime64[D]')) != np.timedelta64(1, 'D')):
+        raise ValueError('era5 daily store needs continuous daily data, check years ' + str(years))
+
+    # write values year by year
+    with xr.open_dataset(filenames_in[0]) as ds:
+        latitude, longitude, attrs = ds.latitude.values, ds.longitude.values, ds[variable].attrs
+    values = np.lib.format.open_memmap(filename_values, mode='w+', dtype=np.float32, shape=(time.size, latitude.size, longitude.size))
+    start  = 0
+    for filename_in in filenames_in:
+        with xr.open_dataset(filename_in) as ds:
+            da                                 = ds[variable].transpose('time', 'latitude', 'longitude')
+            values[start:start + da.time.size] = da.values
+            start                              = start + da.time.size
+    values.flush()
+    del values
+
+    np.savez(filename_index, time=time, latitude=latitude, longitude=longitude, attrs=json.dumps(attrs, default=str))
+    stores.pop((variable, get_store_grid(grid)), None)
+
+
+def open_era5_daily_store(variable, grid):
+    """
+    Opens (once per process) the daily era5 store of variable on grid as a
+    read-only memory map. Returns (values, time, latitude, longitude, attrs).
+    """
+    key = (variable, get_store_grid(grid))
+    if key not in stores:
+        filename_values, filename_index = get_store_filenames(variable, grid)
+        index       = np.load(filename_index)
+        values      = np.load(filename_values, mmap_mode='r')
+        stores[key] = (values, index['time'], index['latitude'], index['longitude'], json.loads(str(index['attrs'])))
+    return stores[key]
+
+
+def era5_window(variable, grid, start, ndays):
+    """
+    Returns ndays of daily era5 data from date start as a (time, latitude,
+    longitude) DataArray. The day offset is computed directly from the first
+    date in the store and the data is a zero-copy view of the memory map.
+    """
+    values, time, latitude, longitude, attrs = open_era5_daily_store(variable, grid)
+    offset = int((np.datetime64(pd.Timestamp(start), 'D') - time[0].astype('datetime64[D]')) / np.timedelta64(1, 'D'))
+    if (offset < 0) or (offset + ndays > time.size):
+        raise ValueError('era5 daily store of ' + variable + ' does not cover ' + str(ndays) + ' days from ' + str(start))
+    coords = dict(time=time[offset:offset + ndays], latitude=latitude, longitude=longitude)
+    return xr.DataArray(values[offset:offset + ndays], coords=coords, dims=['time', 'latitude', 'longitude'], attrs=attrs, name=variable)
@@ -5,6 +5,7 @@ Collection of useful miscellaneous functions
 import time
 import numpy  as np
 import xarray as xr
+import pandas as pd
 from scipy    import signal
 import os
 import matplotlib.pyplot as plt
@@ -61,6 +62,49 @@ def xy_mean(ds):
     ds      = ds.weighted(weights).mean(dim=('latitude','longitude'))
     return ds        
 
+def resample_fixed_cadence(data, freq, how):
+    """
+    Same as getattr(data.resample(time=freq), how)('time'), e.g. 6hourly to
+    daily sums with freq='1D' and how='sum'. If the time axis is regular and
+    its step divides freq (which divides a day), the reduction is done on a
+    (..., bins, steps per bin, ...) reshape of the values instead of pandas
+    groupby. A partial first or last bin is reduced on its own as in
+    resample. Irregular time axes fall back to resample.
+    """
+    if isinstance(data, xr.Dataset):
+        data = data.map(lambda da: resample_fixed_cadence(da, freq, how) if 'time' in da.dims else da, keep_attrs=True)
+        data = data.map(lambda da: da if 'time' in da.dims else da.expand_dims(time=data.time), keep_attrs=True) # resample broadcasts variables without time
+        return data.transpose('time', ...) # as Dataset.resample
+
+    time    = pd.DatetimeIndex(data.time.values)
+    period  = pd.Timedelta(freq)
+    step    = time[1] - time[0] if time.size > 1 else pd.Timedelta(0)
+    regular = (step > pd.Timedelta(0)) and np.all(np.diff(time.values) == step.to_timedelta64()) and \
+              (period % step == pd.Timedelta(0)) and (pd.Timedelta('1D') % period == pd.Timedelta(0))
+    if not regular: return getattr(data.resample(time=freq), how)('time')
+
+    # bins: partial first bin, full bins of period/step values, partial last bin
+    labels = time.floor(freq)
+    steps  = period // step
+    head   = np.searchsorted(labels, labels[0], side='right')
+    nfull  = (time.size - head) // steps
+    bins   = [(0, head, 1), (head, head + nfull*steps, nfull), (head + nfull*steps, time.size, 1)]
+
+    axis   = data.get_axis_num('time')
+    values = data.values
+    dims   = data.dims[:axis] + ('time', 'cadence_step') + data.dims[axis+1:]
+    reduced = []
+    for start, stop, number_bins in bins:
+        if stop == start: continue
+        block = values[(slice(None),)*axis + (slice(start, stop),)]
+        block = block.reshape(block.shape[:axis] + (number_bins, (stop - start)//number_bins) + block.shape[axis+1:])
+        reduced.append(getattr(xr.DataArray(block, dims=dims), how)('cadence_step').values)
+
+    coords = {name: coord for name, coord in data.coords.items() if 'time' not in coord.dims}
+    coords['time'] = labels.unique()
+    return xr.DataArray(np.concatenate(reduced, axis=axis), coords=coords, dims=data.dims, name=data.name, attrs=data.attrs)
+
+
 def rm_lpyr_days(data):
     """ 
     removes leap-year days from daily xrray dataset
@@ -163,9 +207,13 @@ def subselect_xy_domain_from_dim(dim,domain,grid):
     return dim
 
 
-def to_netcdf_with_packing_and_compression(data, filename, dtype='int16', zlib=True, complevel=5):
+def to_netcdf_with_packing_and_compression(data, filename, dtype='int16', zlib=True, complevel=5, shuffle=True, chunksizes=None):
     """
     Writes an xarray DataArray or Dataset to a NetCDF file, applying packing and zlib compression.
+    The min/max used for packing are taken block by block (calc_nanmin_nanmax_blockwise), so
+    lazy data is never loaded whole, and the file is written chunked, shuffled and compressed
+    in one pass, so no nccopy round trip (misc.compress_file) is needed afterwards.
+    Lossless (unpacked) output is written with to_netcdf_with_compression.
     
     Parameters:
     - data (xarray.DataArray or xarray.Dataset): The data to write to file.
@@ -173,6 +221,9 @@ def to_netcdf_with_packing_and_compression(data, filename, dtype='int16', zlib=T
     - dtype (str): The target dtype for packing. Default is 'int16'.
     - zlib (bool): Whether to apply zlib compression. Default is True.
     - complevel (int): Compression level from 1 to 9. Default is 5.
+    - shuffle (bool): Whether to apply the HDF5 byte shuffle filter. Default is True.
+    - chunksizes (dict or None): Chunk size per dimension name, e.g. config.chunks['anomaly'].
+      Dimensions not listed are stored whole. Default is None (netcdf library default chunking).
     """
     
     def calculate_scale_and_offset(min_val, max_val, dtype):
@@ -198,32 +249,85 @@ def to_netcdf_with_packing_and_compression(data, filename, dtype='int16', zlib=T
     for var in data_vars:
         da = data[var] if isinstance(data, xr.Dataset) else data
         
-        min_val = float(da.min())
-        max_val = float(da.max())
-        
-        scale_factor, add_offset = calculate_scale_and_offset(min_val, max_val, dtype)
-        
         encoding[var] = {
-            'dtype': dtype,
-            'scale_factor': scale_factor,
-            'add_offset': add_offset,
             'zlib': zlib,
-            '_FillValue': fill_value,
+            'shuffle': shuffle,
             'complevel': complevel
         }
+
+        if chunksizes is not None:
+            encoding[var]['chunksizes'] = get_chunksizes(da, chunksizes)
+
+        min_val, max_val = calc_nanmin_nanmax_blockwise(da)
+        scale_factor, add_offset = calculate_scale_and_offset(min_val, max_val, dtype)
+        encoding[var].update({
+            'dtype': dtype,
+            'scale_factor': scale_factor,
+            'add_offset': add_offset,
+            '_FillValue': fill_value
+        })
     
     # Write the data to a NetCDF file with the specified encoding
-    data.to_netcdf(filename, encoding=encoding)
+    data.to_netcdf(filename, format='NETCDF4', engine='netcdf4', encoding=encoding)
 
     return
 
 
+def calc_nanmin_nanmax(values, block_size=2**22):
+    """
+    Returns the nan-ignoring (min, max) of an array as python floats. The array
+    is visited block by block (flattened, block_size elements at a time) so both
+    statistics come from one sweep over memory without temporary copies of the
+    full array.
+    """
+    values  = np.ravel(values)
+    min_val = np.inf
+    max_val = -np.inf
+    for start in range(0, values.size, block_size):
+        block = values[start:start + block_size]
+        if np.isnan(block).all(): continue
+        min_val = min(min_val, np.nanmin(block))
+        max_val = max(max_val, np.nanmax(block))
+    if min_val > max_val: min_val = max_val = np.nan
+    return float(min_val), float(max_val)
+
+
+def calc_nanmin_nanmax_blockwise(da, block_size=2**22):
+    """
+    calc_nanmin_nanmax of a DataArray that may be lazy (file or dask backed),
+    reading it a few slices of its first dimension at a time so that at most
+    about block_size elements are in memory at once.
+    """
+    if da.ndim == 0: return calc_nanmin_nanmax(da.values)
+    step    = max(1, block_size // max(1, da[0].size))
+    min_val = np.inf
+    max_val = -np.inf
+    for start in range(0, da.shape[0], step):
+        block_min, block_max = calc_nanmin_nanmax(da[start:start + step].values, block_size)
+        if np.isnan(block_min): continue
+        min_val = min(min_val, block_min)
+        max_val = max(max_val, block_max)
+    if min_val > max_val: min_val = max_val = np.nan
+    return float(min_val), float(max_val)
+
+
+
+def get_chunksizes(da, chunksizes):
+    """
+    Returns the netcdf chunk shape of DataArray da given a chunk size per 
+    dimension name. Dimensions not in chunksizes are stored whole.
+    """
+    return tuple(min(chunksizes.get(dim,size),size) for dim, size in zip(da.dims,da.shape))
+
 
 
-def to_netcdf_with_compression(data,comp_lev,path,filename):
+def to_netcdf_with_compression(data,comp_lev,path,filename,chunksizes=None,format='NETCDF4'):
     """
     Uses xarray's native compression to write to netcdf with compression
-    using to_netcdf function
+    using to_netcdf function. chunksizes optionally sets the chunk size per
+    dimension name, e.g. config.chunks['probability']. The netcdf4 backend
+    applies the byte shuffle filter by default (as nccopy -s in compress_file),
+    so raw downloads are compressed losslessly without the nccopy round trip.
     """
     # Define your compression options
     #compression_opts = {'zlib': True, 'complevel': comp_lev, 'shuffle': True}
@@ -231,11 +335,14 @@ def to_netcdf_with_compression(data,comp_lev,path,filename):
     
     # Check if data is a DataArray or Dataset, set encoding and write to netcdf
     if isinstance(data, xr.DataArray):
-        encoding = {data.name: compression_opts}  # Use the name of the DataArray
-        data.to_netcdf(path+filename, format='NETCDF4', engine='netcdf4', encoding=encoding)
+        encoding = {data.name: dict(compression_opts)}  # Use the name of the DataArray
+        if chunksizes is not None: encoding[data.name]['chunksizes'] = get_chunksizes(data, chunksizes)
+        data.to_netcdf(path+filename, format=format, engine='netcdf4', encoding=encoding)
     elif isinstance(data, xr.Dataset):
-        encoding = {var: compression_opts for var in data.data_vars}  # Apply to all variables
-        data.to_netcdf(path+filename, format='NETCDF4', engine='netcdf4', encoding=encoding)
+        encoding = {var: dict(compression_opts) for var in data.data_vars}  # Apply to all variables
+        if chunksizes is not None:
+            for var in data.data_vars: encoding[var]['chunksizes'] = get_chunksizes(data[var], chunksizes)
+        data.to_netcdf(path+filename, format=format, engine='netcdf4', encoding=encoding)
     else:
         raise TypeError("The array must be either an xarray DataArray or Dataset")
     return
@@ -0,0 +1,211 @@
+"""
+Collection of functions for consolidated zarr stores of the smoothed
+anomaly, probability and binary products. There is one store per
+(product, domain, variable, grid, pval) holding all initialization dates
+along an appendable forecast_date dimension, so the score scripts open one
+store lazily (with dask) instead of one netcdf file per initialization date.
+The per-date netcdf files are still written by the process scripts, the
+stores are optional.
+
+For per-date netcdf files already on disk, build_reference_index instead
+builds a kerchunk reference index (json) of the byte ranges of their chunks,
+which opens as the same kind of lazy dataset over all dates without
+rewriting any data. kerchunk is only needed to build the index.
+"""
+
+import numpy    as np
+import xarray   as xr
+import pandas   as pd
+import json
+import base64
+import re
+import glob
+import os
+from Dunnsigouin_etal_2025 import config,misc
+
+
+def get_store_filename(product, domain, variable, grid, pval=None):
+    """
+    Returns the filename of the zarr store of product, a key of config.dirs
+    such as 's2s_forecast_weekly_probability'. pval is given for the
+    probability and binary products.
+    """
+    path = config.dirs['zarr'] + product + '/'
+    if pval is not None: path = path + str(pval) + '/'
+    return path + domain + '/' + variable + '_' + grid + '.zarr'
+
+
+def to_store_format(da, date):
+    """
+    Adds a forecast_date dimension of length 1 to DataArray da of one
+    initialization date. The time coordinate (valid dates) differs between
+    initialization dates, so it is replaced by the lead time index 1..ntime
+    and kept as the coordinate valid_time(forecast_date,time).
+    """
+    valid_time = da['time'].values
+    da         = da.assign_coords(time=np.arange(1, da['time'].size + 1))
+    da         = da.expand_dims(forecast_date=[pd.Timestamp(date)])
+    da         = da.assign_coords(valid_time=(('forecast_date','time'), valid_time[None,:]))
+    return da
+
+
+def append_to_store(da, filename, date, chunksizes=config.store_chunks):
+    """
+    Writes DataArray da of one initialization date to the zarr store filename.
+    Creates the store on first write, appends new dates along forecast_date
+    and overwrites dates already in the store in place. The metadata is
+    consolidated after every write.
+
+    Appending changes the size of forecast_date and is not safe from several
+    processes at once, overwriting existing dates (region writes) is.
+    """
+    ds = to_store_format(da, date).to_dataset()
+
+    if not os.path.exists(filename):
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        encoding = {var: {'chunks': misc.get_chunksizes(ds[var], chunksizes)} for var in ds.data_vars}
+        ds.to_zarr(filename, mode='w', consolidated=True, encoding=encoding, zarr_format=2) # consolidated metadata is not part of zarr format 3
+        return
+
+    with xr.open_zarr(filename, consolidated=True) as ds_store:
+        forecast_dates = ds_store['forecast_date'].to_index()
+
+    if pd.Timestamp(date) in forecast_dates:
+        i  = forecast_dates.get_loc(pd.Timestamp(date))
+        ds = ds.drop_vars([var for var in ds.variables if 'forecast_date' not in ds[var].dims])
+        ds.to_zarr(filename, region={'forecast_date':slice(i, i + 1)}, consolidated=True)
+    else:
+        ds.to_zarr(filename, append_dim='forecast_date', consolidated=True)
+
+
+def open_store(filename, forecast_dates=None):
+    """
+    Opens the zarr store filename lazily as a dask-backed Dataset using the
+    consolidated metadata, optionally selecting forecast_dates. A filename
+    ending in .json is opened as a reference index (see open_reference_index).
+    """
+    if filename.endswith('.json'): return open_reference_index(filename, forecast_dates)
+    ds = xr.open_zarr(filename, consolidated=True)
+    if forecast_dates is not None: ds = ds.sel(forecast_date=pd.to_datetime(forecast_dates))
+    return ds
+
+
+def get_product_path(product, domain, variable, pval=None):
+    """
+    Returns the directory of the per-date netcdf files of product, as 
+    written by the process scripts.
+    """
+    path = config.dirs[product]
+    if pval is not None: path = path + str(pval)
+    return path + '/' + domain + '/' + variable + '/'
+
+
+def get_reference_index_filename(product, domain, variable, grid, pval=None):
+    """
+    Returns the filename of the reference index (json) of product and the
+    directory holding the references of each per-date file.
+    """
+    filename = get_store_filename(product, domain, variable, grid, pval)[:-len('.zarr')]
+    return filename + '_refs.json', filename + '_refs/'
+
+
+def set_valid_time_refs(refs, valid_time):
+    """
+    Replaces the time coordinate in the kerchunk references refs of one
+    per-date file by an inlined variable valid_time(time) holding the dates
+    valid_time in seconds since 1970-01-01. The valid dates, and the units
+    each file encodes them in, differ between initialization dates, so time
+    cannot be a coordinate shared by all files. As a variable it is instead
+    concatenated along forecast_date, as in to_store_format.
+    """
+    seconds = ((valid_time - np.datetime64('1970-01-01')) // np.timedelta64(1, 's')).astype('<i8')
+    zarray  = dict(shape=[seconds.size], chunks=[seconds.size], dtype='<i8', fill_value=None, order='C', filters=None, compressor=None, zarr_format=2)
+    zattrs  = dict(_ARRAY_DIMENSIONS=['time'], units='seconds since 1970-01-01 00:00:00', calendar='proleptic_gregorian')
+
+    refs['refs']                       = {key: value for key, value in refs['refs'].items() if not key.startswith('time/')}
+    refs['refs']['valid_time/.zarray'] = json.dumps(zarray)
+    refs['refs']['valid_time/.zattrs'] = json.dumps(zattrs)
+    refs['refs']['valid_time/0']       = 'base64:' + base64.b64encode(seconds.tobytes()).decode()
+    return refs
+
+
+def get_packing_refs(refs, variable):
+    """
+    Returns the packing (scale_factor, add_offset, _FillValue) of variable
+    in the kerchunk references refs of one per-date file, None where unset.
+    """
+    zattrs = json.loads(refs['refs'][variable + '/.zattrs'])
+    zarray = json.loads(refs['refs'][variable + '/.zarray'])
+    return dict(scale_factor=zattrs.get('scale_factor'), add_offset=zattrs.get('add_offset'), _FillValue=zattrs.get('_FillValue', zarray.get('fill_value')))
+
+
+def build_reference_index(product, domain, variable, grid, pval=None):
+    """
+    Scans the per-date netcdf files of product and builds a kerchunk
+    reference index over all of them, concatenated along forecast_date
+    (taken from the date in the filename). The valid dates of each file are
+    kept as valid_time(forecast_date,time), see set_valid_time_refs. The
+    references of each file are kept in their own json, so only new or
+    modified files are scanned when the index is rebuilt. Returns the
+    filename of the index.
+
+    The combined index keeps the attributes of the first file only, so all
+    files must share the same packing (scale_factor, add_offset,
+    _FillValue). Files packed per date by to_netcdf_with_packing_and_compression
+    raise a ValueError; use the zarr stores for those products.
+    """
+    from kerchunk.hdf     import SingleHdf5ToZarr
+    from kerchunk.combine import MultiZarrToZarr
+
+    path_in                   = get_product_path(product, domain, variable, pval)
+    filename_index, path_refs = get_reference_index_filename(product, domain, variable, grid, pval)
+    filenames                 = sorted(glob.glob(path_in + variable + '_' + grid + '_????-??-??.nc'))
+    if len(filenames) == 0:
+        raise ValueError('no files of ' + variable + ' on grid ' + grid + ' in ' + path_in)
+    os.makedirs(path_refs, exist_ok=True)
+
+    # references of each file, skipping files scanned since they were last written
+    filenames_refs = []
+    packing        = None
+    for filename in filenames:
+        filename_refs = path_refs + os.path.basename(filename)[:-len('.nc')] + '.json'
+        refs          = None
+        if os.path.exists(filename_refs) and (os.path.getmtime(filename_refs) >= os.path.getmtime(filename)):
+            with open(filename_refs) as f: refs = json.load(f)
+            if 'valid_time/.zarray' not in refs['refs']: refs = None # rescan references written without valid_time
+        if refs is None:
+            print('scanning ' + filename)
+            with open(filename, 'rb') as f: refs = SingleHdf5ToZarr(f, filename, inline_threshold=300).translate()
+            with xr.open_dataset(filename) as ds: refs = set_valid_time_refs(refs, ds['time'].values)
+            with open(filename_refs, 'w') as f: json.dump(refs, f)
+        filenames_refs.append(filename_refs)
+
+        # one concatenated array has one codec, the packing must be the same in every file
+        if packing is None: packing, filename_packing = get_packing_refs(refs, variable), filename
+        elif get_packing_refs(refs, variable) != packing:
+            raise ValueError('packing of ' + variable + ' in ' + filename + ' ' + str(get_packing_refs(refs, variable)) + ' differs from ' +
+                             filename_packing + ' ' + str(packing) + ', a reference index needs files packed identically (or unpacked), use the zarr stores instead')
+
+    # combine along forecast_date. time has no coordinate in the references
+    # and becomes the lead time index when the index is opened
+    mzz  = MultiZarrToZarr(filenames_refs, concat_dims=['forecast_date'], identical_dims=['box_size','latitude','longitude'],
+                           coo_map={'forecast_date':re.compile(r'_(\d{4}-\d{2}-\d{2})\.json$')}, coo_dtypes={'forecast_date':np.dtype('M8[ns]')})
+    refs = mzz.translate()
+    with open(filename_index, 'w') as f: json.dump(refs, f)
+
+    return filename_index
+
+
+def open_reference_index(filename_index, forecast_dates=None):
+    """
+    Opens the reference index filename_index (see build_reference_index) as
+    one lazy dask-backed Dataset over all dates, chunked as the netcdf files,
+    optionally selecting forecast_dates. As in the zarr stores, time is the
+    lead time index 1..ntime and the valid dates are the coordinate
+    valid_time(forecast_date,time).
+    """
+    storage_options = dict(fo=filename_index, remote_protocol='file')
+    ds              = xr.open_dataset('reference://', engine='zarr', chunks={}, backend_kwargs=dict(consolidated=False, storage_options=storage_options))
+    ds              = ds.set_coords('valid_time').assign_coords(time=np.arange(1, ds.sizes['time'] + 1))
+    if forecast_dates is not None: ds = ds.sel(forecast_date=pd.to_datetime(forecast_dates))
+    return ds
@@ -7,18 +7,164 @@ import numpy    as np
 import xarray   as xr
 import pandas   as pd
 import os
+import itertools
 from datetime   import datetime
 from scipy      import signal, ndimage
-from Dunnsigouin_etal_2025  import misc,s2s
+from concurrent.futures     import ThreadPoolExecutor
+from collections            import deque
+from Dunnsigouin_etal_2025  import misc,s2s,config,store
 
 
 
-def boxcar_smoother_xy_optimized(box_sizes, da, output_type):
+def calc_summed_area_table(values, block_size=2**22):
+    """
+    Calculates the summed-area table (integral image) over the last two
+    dimensions (latitude & longitude) of a numpy array. The table is padded
+    with a leading row and column of zeros so that any box sum is given by
+    four corner lookups. Accumulates in float64 to limit round-off.
+    Returns (table, nan_table). Nans are summed as zeros in table and counted
+    in nan_table (None if values has no nans), so that a nan only sets the
+    boxes that contain it to nan instead of all downstream points of the table.
+    The table is filled a few slices of the first dimension (about block_size
+    grid points) at a time, so the only full size array is the table itself.
+    """
+    if values.ndim == 2:
+        table, nan_table = calc_summed_area_table(values[None], block_size)
+        return table[0], None if nan_table is None else nan_table[0]
+
+    step      = max(1, block_size // values[0].size)
+    shape     = values.shape[:-2] + (values.shape[-2] + 1, values.shape[-1] + 1)
+    table     = np.zeros(shape, dtype=np.float64)
+    nan_table = None
+    if any(np.isnan(values[start:start + step]).any() for start in range(0, values.shape[0], step)):
+        nan_table = np.zeros(shape, dtype=np.int32)
+    for start in range(0, values.shape[0], step):
+        block = values[start:start + step]
+        if nan_table is not None:
+            isnan = np.isnan(block)
+            block = np.where(isnan, 0.0, block)
+            np.cumsum(isnan, axis=-2, dtype=np.int32, out=nan_table[start:start + step, ..., 1:, 1:])
+            np.cumsum(nan_table[start:start + step, ..., 1:, 1:], axis=-1, out=nan_table[start:start + step, ..., 1:, 1:])
+        np.cumsum(block, axis=-2, dtype=np.float64, out=table[start:start + step, ..., 1:, 1:])
+        np.cumsum(table[start:start + step, ..., 1:, 1:], axis=-1, out=table[start:start + step, ..., 1:, 1:])
+    return table, nan_table
+
+
+def get_summed_area_table_block(tables, block):
+    """
+    Selects block (a slice of the first dimension) of the (table, nan_table)
+    of calc_summed_area_table.
+    """
+    if tables is None: return None
+    table, nan_table = tables
+    return table[block], None if nan_table is None else nan_table[block]
+
+
+def calc_window_difference(table, half, out):
+    """
+    table[..., hi] - table[..., lo] along the last axis, written into out,
+    with lo = i - half and hi = i + half + 1 clipped to the n + 1 entries of
+    a (zero padded) cumulative sum, i.e. the sum over a window of 2*half + 1
+    points centred on each of the n points of out. Each range of i with the
+    same clipping is one ufunc call on slices, so nothing is gathered.
+    """
+    n = out.shape[-1]
+    a = min(half, n)          # lo is clipped to 0 below a
+    b = max(n - half - 1, 0)  # hi is clipped to n from b
+    if min(a, b) > 0: out[..., :min(a, b)] = table[..., half + 1:half + 1 + min(a, b)]
+    if a < b: np.subtract(table[..., a + half + 1:b + half + 1], table[..., a - half:b - half], out=out[..., a:b])
+    if b < a: out[..., b:a] = table[..., n:n + 1]
+    if max(a, b) < n: np.subtract(table[..., n:n + 1], table[..., max(a, b) - half:n - half], out=out[..., max(a, b):])
+    return out
+
+
+def calc_box_sum_from_summed_area_table(table, size, out):
+    """
+    Sum over an odd sized box (grid points per side) centred on each grid 
+    point from a summed-area table, with points outside the domain counted
+    as zeros, written into out. Sums along latitude, into a buffer the size
+    of out plus one longitude, then along longitude.
+    """
+    half = size // 2
+    rows = np.empty(out.shape[:-1] + table.shape[-1:], dtype=table.dtype)
+    calc_window_difference(np.swapaxes(table, -1, -2), half, np.swapaxes(rows, -1, -2))
+    calc_window_difference(rows, half, out)
+    return out
+
+
+def boxcar_smoother_from_summed_area_table(tables, size, out, block_size=2**22):
+    """
+    Boxcar mean over an odd sized box (grid points per side) from the 
+    (table, nan_table) of calc_summed_area_table, written into out. Points
+    outside the domain are counted as zeros, which is identical to 
+    ndimage.uniform_filter with mode='constant' and cval=0.0 for data
+    without nans. Boxes containing a nan are nan. (ndimage.uniform_filter
+    carries a nan further along its running sums, so it also sets some boxes
+    without nans to nan.)
+    Works on a few slices of the first dimension (about block_size grid
+    points) at a time, so the temporaries stay small whatever the size of out.
+    """
+    table, nan_table = tables
+    if out.ndim == 2: return boxcar_smoother_from_summed_area_table((table[None], None if nan_table is None else nan_table[None]), size, out[None], block_size)[0]
+    step = max(1, block_size // out[0].size)
+    for start in range(0, out.shape[0], step):
+        block = slice(start, start + step)
+        calc_box_sum_from_summed_area_table(table[block], size, out[block])
+        out[block] /= size**2
+        if nan_table is not None:
+            nan_count = calc_box_sum_from_summed_area_table(nan_table[block], size, np.empty(out[block].shape, dtype=nan_table.dtype))
+            out[block][nan_count > 0] = np.nan
+    return out
+
+
+def get_leading_axis_blocks(shape, number_blocks):
+    """
+    Splits the first dimension of an array with more than two dimensions
+    (e.g. hdate, number or time in front of latitude & longitude) into
+    contiguous blocks. Returns one block covering the whole array otherwise.
+    """
+    if (len(shape) <= 2) or (number_blocks <= 1):
+        return [slice(None)]
+    edges = np.linspace(0, shape[0], min(number_blocks, shape[0]) + 1).astype(int)
+    return [slice(edges[k], edges[k+1]) for k in range(edges.size - 1)]
+
+
+def boxcar_smoother_block(values, tables, size, method, out):
+    """
+    Smooths one block of values with one odd box size and writes the result
+    into out. Used by the smoothers below so that blocks can be run on
+    separate threads (ndimage.uniform_filter releases the GIL).
+    """
+    if method == 'uniform_filter':
+        filter_size = [1] * (values.ndim - 2) + [size, size]
+        ndimage.uniform_filter(values, size=filter_size, output=out, mode='constant', cval=0.0)
+    elif method == 'summed_area_table':
+        boxcar_smoother_from_summed_area_table(tables, size, out)
+    return
+
+
+def boxcar_smoother_xy_optimized(box_sizes, da, output_type, method='uniform_filter', out=None, dtype=np.float64, workers=1):
     """
     Smooths an array in xy using a boxcar smoother where the last two
     dimensions are latitude & longitude.
     Note: only performs calculation on odd sized box sizes (e.g., 1,3,5,...)
     where the size refers to the number of grid points per side of a square.  
+
+    method = 'uniform_filter' calls ndimage.uniform_filter for each box size.
+    method = 'summed_area_table' computes the summed-area table of the field once
+    and gets every box size from corner lookups. Both use zero padded edges.
+    summed_area_table holds the float64 table (twice the size of a float32
+    input) next to the output, uniform_filter only the output.
+    For data with nans, summed_area_table sets only the boxes containing a nan
+    to nan, while uniform_filter carries a nan further along its running sums.
+
+    Results are written in place into the numpy array out with shape
+    (box_sizes.size,) + da.shape if given, else into a new array of type dtype
+    (e.g. 'float32' to halve memory). The xarray output wraps out without
+    copying and the numpy output is out itself.
+
+    workers > 1 splits the work by box size and by blocks of the first
+    dimension over a pool of threads, each writing to its own slice of out.
     """
     # Ensure that the input is an xarray DataArray
     if not isinstance(da, xr.DataArray):
@@ -28,30 +174,99 @@ def boxcar_smoother_xy_optimized(box_sizes, da, output_type):
     if (da.dims[-2], da.dims[-1]) != ('latitude', 'longitude'):
         raise ValueError("The last two dimensions of 'da' must be 'latitude' and 'longitude'")
 
-    # Initialize output array smooth_values = np.full((len(box_sizes),) + da.shape, np.nan, dtype='float32')
-    #coords        = {'box_size': box_sizes, **da.coords}
-    #dims          = ['box_size'] + list(da.dims)
+    if method not in ('uniform_filter', 'summed_area_table'):
+        raise ValueError("Input 'method' must be 'uniform_filter' or 'summed_area_table'")
 
-    # initialize output array    
-    temp          = np.zeros((box_sizes.size,) + da.shape)
-    coords        = {'box_size': box_sizes, **da.coords}
-    dims          = ['box_size'] + list(da.dims)
-    smooth_values = xr.DataArray(temp, coords=coords, dims=dims)
-    
-    # Apply the uniform filter for each box size
+    # initialize output array or check the one given
+    shape = (box_sizes.size,) + da.shape
+    if out is None:
+        out = np.zeros(shape, dtype=dtype)
+    elif out.shape != shape:
+        raise ValueError("Input 'out' must have shape " + str(shape))
+
+    values = da.values
+    table  = None
+
+    # summed-area table is computed once and shared by all box sizes
+    if method == 'summed_area_table':
+        table = calc_summed_area_table(values)
+
+    # list of (box size, block) tasks. Even box sizes are set to zero.
+    blocks = get_leading_axis_blocks(da.shape, workers)
+    tasks  = []
     for i, size in enumerate(box_sizes):
         if size % 2 != 0:  # Ensure the box size is odd
-            filter_size           = [1] * (da.ndim - 2) + [size, size]
-            smooth_values[i, ...] = ndimage.uniform_filter(da, size=filter_size, mode='constant',cval=0.0)
+            tasks += [(i, size, block) for block in blocks]
+        else:
+            out[i, ...] = 0.0
+
+    def run(task):
+        i, size, block = task
+        boxcar_smoother_block(values[block], get_summed_area_table_block(table, block), size, method, out[i][block])
+
+    # Apply the uniform filter for each box size
+    if workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(run, tasks))
+    else:
+        for task in tasks:
+            run(task)
 
     # Create the DataArray if desired. Else, remains numpy array
     if output_type == 'xarray':
-        #return xr.DataArray(smooth_values, coords=coords, dims=dims)
-        return smooth_values
+        coords = {'box_size': box_sizes, **da.coords}
+        dims   = ['box_size'] + list(da.dims)
+        return xr.DataArray(out, coords=coords, dims=dims)
     elif output_type == 'numpy':
-        return smooth_values.values
+        return out
     
 
+def iter_boxcar_smooth(da, box_sizes, output_type='numpy', method='uniform_filter', dtype=np.float64, workers=1):
+    """
+    Generator version of boxcar_smoother_xy_optimized that yields
+    (box_size, smoothed field) one box size at a time, so that peak memory
+    does not depend on the number of box sizes.
+    Note: the smoothed field is written into one scratch array that is reused
+    for every box size. Copy it if it is needed after the next iteration.
+    Even box sizes yield zeros, as in boxcar_smoother_xy_optimized.
+    workers > 1 splits each box size by blocks of the first dimension over
+    a pool of threads.
+    """
+    # Ensure that the input is an xarray DataArray
+    if not isinstance(da, xr.DataArray):
+        raise ValueError("Input 'da' must be an xarray DataArray")
+
+    # Check if the last two dimensions are latitude and longitude
+    if (da.dims[-2], da.dims[-1]) != ('latitude', 'longitude'):
+        raise ValueError("The last two dimensions of 'da' must be 'latitude' and 'longitude'")
+
+    if method not in ('uniform_filter', 'summed_area_table'):
+        raise ValueError("Input 'method' must be 'uniform_filter' or 'summed_area_table'")
+
+    values  = da.values
+    table   = None
+    scratch = np.zeros(da.shape, dtype=dtype)
+    blocks  = get_leading_axis_blocks(da.shape, workers)
+
+    # summed-area table is computed once and shared by all box sizes
+    if method == 'summed_area_table':
+        table = calc_summed_area_table(values)
+
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+        for size in box_sizes:
+            if size % 2 != 0:  # Ensure the box size is odd
+                futures = [executor.submit(boxcar_smoother_block, values[block], get_summed_area_table_block(table, block), size, method, scratch[block]) for block in blocks]
+                for future in futures:
+                    future.result()
+            else:
+                scratch[...] = 0.0
+
+            if output_type == 'xarray':
+                yield size, xr.DataArray(scratch, coords=da.coords, dims=da.dims)
+            elif output_type == 'numpy':
+                yield size, scratch
+
+
 def boxcar_smoother_xy(box_sizes,da):
     """
     Smooths an array in xy using a boxcar smoother where the last two 
@@ -94,10 +309,41 @@ def boxcar_smoother_xy(box_sizes,da):
 
 
 
-def calc_score_bootstrap(reference_error, forecast_error, number_shuffle_bootstrap, box_sizes):
+def calc_bootstrap_counts(number_forecasts, number_bootstrap, rng=None):
+    """
+    Draws the number of times each forecast date is picked in number_bootstrap
+    resamples with replacement, i.e. a (number_bootstrap, number_forecasts)
+    multinomial count matrix whose rows sum to number_forecasts.
+    Draws from the numpy.random.Generator rng if given, else from the global
+    np.random state.
+    """
+    probabilities = np.full(number_forecasts, 1.0 / number_forecasts)
+    if rng is None: rng = np.random
+    return rng.multinomial(number_forecasts, probabilities, size=number_bootstrap).astype(np.float32)
+
+
+def get_bootstrap_generators(number_batches, seed=None):
+    """
+    Independent random generators, one per batch of resamples, spawned from
+    one SeedSequence so that batches run on separate threads do not share a
+    random state and the result does not depend on the thread scheduling.
+    Without seed the entropy is drawn from the global np.random state, so
+    np.random.seed still makes the result reproducible.
+    """
+    if seed is None: seed = np.random.randint(0, np.iinfo(np.int64).max, dtype=np.int64)
+    seed_sequence = np.random.SeedSequence(int(seed))
+    return [np.random.default_rng(child) for child in seed_sequence.spawn(number_batches)]
+
+
+def calc_score_bootstrap(reference_error, forecast_error, number_shuffle_bootstrap, box_sizes, method='matrix', batch_size=1000):
     """ 
     Calculates skill score and generates bootstrapped estimates by boostrapping 
     subsampling the forecast error term in the skill score.
+
+    method = 'matrix' draws the resamples as multinomial counts of each forecast
+    date in batches of batch_size and gets all bootstrapped mse's of a batch
+    from one float32 matrix product with the (forecast_dates, box_size*time)
+    error matrix. method = 'loop' resamples one bootstrap at a time with isel.
     """
 
     number_forecasts = len(reference_error['forecast_dates'])
@@ -114,22 +360,39 @@ def calc_score_bootstrap(reference_error, forecast_error, number_shuffle_bootstr
     score[:,:] = 1.0 - forecast_mse / reference_mse
     
     # compute score with bootstrap
-    for i in range(number_shuffle_bootstrap):
+    if method == 'matrix':
+
+        error         = forecast_error.transpose('forecast_dates', 'box_size', 'time').values.astype(np.float32)
+        error         = error.reshape(number_forecasts, -1)
+        reference_mse = reference_mse.transpose('box_size', 'time').values
         
-        # subsample forecast dates with replacement
-        sampled_indices = np.random.choice(number_forecasts, number_forecasts, replace=True)
+        for start in range(0, number_shuffle_bootstrap, batch_size):
+            end = min(start + batch_size, number_shuffle_bootstrap)
+
+            score_bootstrap[:,:,start:end] = np.moveaxis(calc_score_bootstrap_batch(error, reference_mse, end - start), 0, -1)
+
+    elif method == 'loop':
+
+        for i in range(number_shuffle_bootstrap):
         
-        # bootstrap forecast mse
-        forecast_mse_bootstrap = forecast_error.isel(forecast_dates=sampled_indices).mean(dim='forecast_dates')
-        score_bootstrap[:,:,i] = 1.0 - forecast_mse_bootstrap / reference_mse
+            # subsample forecast dates with replacement
+            sampled_indices = np.random.choice(number_forecasts, number_forecasts, replace=True)
+        
+            # bootstrap forecast mse
+            forecast_mse_bootstrap = forecast_error.isel(forecast_dates=sampled_indices).mean(dim='forecast_dates')
+            score_bootstrap[:,:,i] = 1.0 - forecast_mse_bootstrap / reference_mse
+
+    else:
+        raise ValueError("Input 'method' must be 'matrix' or 'loop'")
 
     return score, score_bootstrap
 
 
-def calc_score_bootstrap_xy(reference_error, forecast_error, number_shuffle_bootstrap):
+def calc_score_bootstrap_xy(reference_error, forecast_error, number_shuffle_bootstrap, method='matrix', batch_size=500):
     """
     Calculates skill score and generates bootstrapped estimates by boostrapping
     subsampling the forecast error term in the skill score.
+    method = 'matrix' or 'loop' as in calc_score_bootstrap.
     """
 
     number_forecasts = len(reference_error['forecast_dates'])
@@ -148,18 +411,177 @@ def calc_score_bootstrap_xy(reference_error, forecast_error, number_shuffle_boot
     score[:,:] = 1.0 - forecast_mse / reference_mse
 
     # compute score with bootstrap
-    for i in range(number_shuffle_bootstrap):
+    if method == 'matrix':
 
-        # subsample forecast dates with replacement
-        sampled_indices = np.random.choice(number_forecasts, number_forecasts, replace=True)
+        error         = forecast_error.transpose('forecast_dates', 'latitude', 'longitude').values.astype(np.float32)
+        error         = error.reshape(number_forecasts, -1)
+        reference_mse = reference_mse.transpose('latitude', 'longitude').values
 
-        # bootstrap forecast mse
-        forecast_mse_bootstrap   = forecast_error.isel(forecast_dates=sampled_indices).mean(dim='forecast_dates')
-        score_bootstrap[i, ...]  = 1.0 - forecast_mse_bootstrap / reference_mse
+        for start in range(0, number_shuffle_bootstrap, batch_size):
+            end                        = min(start + batch_size, number_shuffle_bootstrap)
+            score_bootstrap[start:end] = calc_score_bootstrap_batch(error, reference_mse, end - start)
+
+    elif method == 'loop':
+
+        for i in range(number_shuffle_bootstrap):
+
+            # subsample forecast dates with replacement
+            sampled_indices = np.random.choice(number_forecasts, number_forecasts, replace=True)
+
+            # bootstrap forecast mse
+            forecast_mse_bootstrap   = forecast_error.isel(forecast_dates=sampled_indices).mean(dim='forecast_dates')
+            score_bootstrap[i, ...]  = 1.0 - forecast_mse_bootstrap / reference_mse
+
+    else:
+        raise ValueError("Input 'method' must be 'matrix' or 'loop'")
 
     return score, score_bootstrap
 
 
+def calc_score_bootstrap_batch(error, reference_mse, number_bootstrap, rng=None):
+    """
+    Bootstrapped scores (number_bootstrap,) + reference_mse.shape for one
+    batch of resamples. error is the (forecast_dates, ...) float32 forecast
+    error matrix flattened after the first dimension, e.g. (forecast_dates,
+    box_size*time), and reference_mse the matching unflattened mse. rng as
+    in calc_bootstrap_counts.
+    """
+    counts                 = calc_bootstrap_counts(error.shape[0], number_bootstrap, rng)
+    forecast_mse_bootstrap = (counts @ error / error.shape[0]).reshape((number_bootstrap,) + reference_mse.shape)
+    return 1.0 - forecast_mse_bootstrap / reference_mse
+
+
+def get_quantile_ranks(number_samples, threshold):
+    """
+    Ranks (0-based) of the two order statistics that bracket a quantile and
+    the interpolation weight between them, as in numpy's default 'linear'
+    quantile method.
+    """
+    virtual_index = (number_samples - 1) * threshold
+    lo            = int(np.clip(np.floor(virtual_index), 0, number_samples - 1))
+    hi            = int(np.clip(lo + 1, 0, number_samples - 1))
+    gamma         = float(virtual_index - np.floor(virtual_index))
+    return lo, hi, gamma
+
+
+def interpolate_quantile(lo_values, hi_values, gamma):
+    """
+    Linear interpolation between two order statistics written the same way
+    as numpy's quantile so that results are identical.
+    """
+    difference = hi_values - lo_values
+    if gamma >= 0.5:
+        return hi_values - difference * (1 - gamma)
+    else:
+        return lo_values + difference * gamma
+
+
+def update_smallest_values(smallest, values, k):
+    """
+    Merges new samples into the k smallest samples seen so far along the
+    first dimension. The k values are kept unsorted.
+    """
+    merged = values if smallest is None else np.concatenate([smallest, values], axis=0)
+    if merged.shape[0] > k:
+        merged = np.partition(merged, k - 1, axis=0)[:k]
+    return merged
+
+
+def calc_significance_from_smallest_values(smallest, number_bootstrap, threshold):
+    """
+    Same as s2s.calc_significant_values_using_bootstrap but from only the k
+    smallest bootstrapped scores (k >= rank of the quantile + 1, see
+    get_quantile_ranks). Returns a numpy array with 1s for non-significant
+    values and nans for significant ones.
+    """
+    # two sided test. e.g. 5% significance means 2.5% percentile > 0.
+    lo, hi, gamma = get_quantile_ranks(number_bootstrap, threshold / 2)
+    smallest      = np.partition(smallest, [lo, hi], axis=0)
+    quantile      = interpolate_quantile(smallest[lo], smallest[hi], gamma)
+    return np.where(quantile < 0, 1.0, np.nan)
+
+
+def calc_score_significance_xy(reference_error, forecast_error, number_shuffle_bootstrap, threshold=0.05, batch_size=500, workers=1, seed=None):
+    """
+    Calculates skill score and its bootstrapped significance map, i.e. the
+    same as calc_score_bootstrap_xy followed by s2s.calc_significant_values_using_bootstrap,
+    without holding all bootstrapped scores. Batches of resamples are run on
+    a pool of threads and only the smallest scores needed for the lower
+    quantile are kept per gridpoint. Each batch draws from its own random
+    generator (see get_bootstrap_generators), so the result for a given seed
+    (or np.random.seed) does not depend on workers.
+    """
+    number_forecasts = len(reference_error['forecast_dates'])
+
+    # Compute the MSE
+    reference_mse = reference_error.mean(dim='forecast_dates').transpose('latitude', 'longitude')
+    forecast_mse  = forecast_error.mean(dim='forecast_dates').transpose('latitude', 'longitude')
+
+    # compute score without bootstrap
+    score = (1.0 - forecast_mse / reference_mse).values
+
+    # compute score with bootstrap and keep k smallest values per gridpoint
+    error         = forecast_error.transpose('forecast_dates', 'latitude', 'longitude').values.astype(np.float32)
+    error         = error.reshape(number_forecasts, -1)
+    reference_mse = reference_mse.values
+    k             = get_quantile_ranks(number_shuffle_bootstrap, threshold / 2)[1] + 1
+    batches       = [min(batch_size, number_shuffle_bootstrap - start) for start in range(0, number_shuffle_bootstrap, batch_size)]
+    generators    = get_bootstrap_generators(len(batches), seed)
+
+    def run(number_bootstrap, rng):
+        score_bootstrap = calc_score_bootstrap_batch(error, reference_mse, number_bootstrap, rng).astype(np.float32)
+        return update_smallest_values(None, score_bootstrap, k)
+
+    smallest = None
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+        for batch_smallest in executor.map(run, batches, generators):
+            smallest = update_smallest_values(smallest, batch_smallest, k)
+
+    sig = calc_significance_from_smallest_values(smallest, number_shuffle_bootstrap, threshold)
+
+    return score, sig
+
+
+
+def calc_score_significance(reference_error, forecast_error, number_shuffle_bootstrap, box_sizes, threshold=0.05, batch_size=1000, store_bootstrap=False):
+    """
+    Calculates skill score and its bootstrapped significance (box_size, time),
+    i.e. the same as calc_score_bootstrap followed by s2s.calc_significant_values_using_bootstrap,
+    keeping only the smallest bootstrapped scores needed for the lower quantile.
+    store_bootstrap = True also returns all bootstrapped scores
+    (box_size, time, number_bootstrap), else None is returned.
+    """
+    number_forecasts = len(reference_error['forecast_dates'])
+
+    # Compute the MSE
+    reference_mse = reference_error.mean(dim='forecast_dates').transpose('box_size', 'time')
+    forecast_mse  = forecast_error.mean(dim='forecast_dates').transpose('box_size', 'time')
+
+    # compute score without bootstrap
+    score = (1.0 - forecast_mse / reference_mse).values
+
+    # compute score with bootstrap and keep k smallest values per (box_size, time)
+    error           = forecast_error.transpose('forecast_dates', 'box_size', 'time').values.astype(np.float32)
+    error           = error.reshape(number_forecasts, -1)
+    reference_mse   = reference_mse.values
+    k               = get_quantile_ranks(number_shuffle_bootstrap, threshold / 2)[1] + 1
+    smallest        = None
+    score_bootstrap = None
+    if store_bootstrap:
+        score_bootstrap = np.empty((len(box_sizes), reference_mse.shape[1], number_shuffle_bootstrap), dtype=np.float32)
+
+    for start in range(0, number_shuffle_bootstrap, batch_size):
+        end                   = min(start + batch_size, number_shuffle_bootstrap)
+        score_bootstrap_batch = calc_score_bootstrap_batch(error, reference_mse, end - start).astype(np.float32)
+        smallest              = update_smallest_values(smallest, score_bootstrap_batch, k)
+        if store_bootstrap:
+            score_bootstrap[:,:,start:end] = np.moveaxis(score_bootstrap_batch, 0, -1)
+
+    sig = calc_significance_from_smallest_values(smallest, number_shuffle_bootstrap, threshold)
+
+    return score, sig, score_bootstrap
+
+
 
 def calc_score_bootstrap_difference(reference_error1, reference_error2, forecast_error1, forecast_error2, number_shuffle_bootstrap, box_sizes):
     """
@@ -500,25 +922,96 @@ def get_data_dimensions(grid, time_flag, domain):
     return misc.subselect_xy_domain_from_dim(dim, domain, grid)
         
 
-def calc_forecast_and_reference_error(score_type, filename_verification, filename_forecast, variable, box_sizes_temp, grid,pval=0.9):
+def read_box_size_subset(filename, variable, box_size, time_index=None, method=None):
     """
-    calculates forecast and reference error for skill scores
+    Reads only the requested box size(s) and optionally one lead time (index) of variable
+    from an anomaly, probability or binary file. The selection is made on the lazily opened
+    file before loading, so with the chunking in config.chunks only the chunks holding
+    the requested (box_size,time) maps are read and decompressed.
+    """
+    with xr.open_dataset(filename) as ds:
+        da = ds[variable].sel(box_size=box_size, method=method)
+        if time_index is not None: da = da.isel(time=time_index)
+        da = da.load()
+    return da
+
+
+
+def read_forecast_verification_pair(filename_verification, filename_forecast, variable, box_sizes_temp, grid, lead_time=None):
     """
-    # read data
-    if (grid == '0.25x0.25') or (grid == 'day1to46_0.5x0.5'):
-        forecast              = xr.open_dataset(filename_forecast)[variable].sel(box_size=box_sizes_temp)
-        verification          = xr.open_dataset(filename_verification)[variable].sel(box_size=box_sizes_temp)
+    Reads forecast and verification box sizes (and optionally one lead time) 
+    of an anomaly or probability/binary file pair for the skill scores.
+    Probabilities are converted from ensemble member counts.
+    """
+    if lead_time is not None:
+        verification = read_box_size_subset(filename_verification, variable, box_sizes_temp, time_index=lead_time-1).squeeze()
+        forecast     = read_box_size_subset(filename_forecast, variable, box_sizes_temp, time_index=lead_time-1).squeeze()
+    elif (grid == '0.25x0.25') or (grid == 'day1to46_0.5x0.5'):
+        forecast              = read_box_size_subset(filename_forecast, variable, box_sizes_temp)
+        verification          = read_box_size_subset(filename_verification, variable, box_sizes_temp)
     elif grid == '0.5x0.5':
         # IMPORANT NOTE: its a bit complicated but here I produce arrays with the same box_size.size as high res data
         # except its only populated with every other box_size from teh high res data. This means that every other
         # box_size dim is a repeat of the next. NEED TO FIGURE OUT HOW TO BETTER COMBINE HIGH AND LOW RES FORECAST SKILL
         # RESULTS!!!!
-        forecast                  = xr.open_dataset(filename_forecast)[variable].sel(box_size=box_sizes_temp,method='nearest')
-        verification              = xr.open_dataset(filename_verification)[variable].sel(box_size=box_sizes_temp,method='nearest')
+        forecast                  = read_box_size_subset(filename_forecast, variable, box_sizes_temp, method='nearest')
+        verification              = read_box_size_subset(filename_verification, variable, box_sizes_temp, method='nearest')
         forecast['box_size']      = box_sizes_temp
         verification['box_size']  = box_sizes_temp
-        
-    # calculate error terms
+
+    # probability files hold ensemble member counts and binary files
+    # uint8 flags, both are promoted to float in the error terms
+    forecast = convert_count_to_probability(forecast)
+
+    return forecast, verification
+
+
+def iter_forecast_verification_pairs(filenames_verification, filenames_forecast, variable, box_sizes_temp, grid, lead_time=None, prefetch=2):
+    """
+    Yields (forecast, verification) of read_forecast_verification_pair for each 
+    pair of filenames in order, while the next prefetch pairs are read and decoded
+    on background threads. The queue of pending reads is bounded, so at most 
+    prefetch pairs are held ahead of the one being used. prefetch=0 reads in 
+    sequence.
+    """
+    args  = (variable, box_sizes_temp, grid, lead_time)
+    pairs = zip(filenames_verification, filenames_forecast)
+
+    if prefetch < 1:
+        for filename_verification, filename_forecast in pairs:
+            yield read_forecast_verification_pair(filename_verification, filename_forecast, *args)
+        return
+
+    with ThreadPoolExecutor(max_workers=prefetch) as executor:
+        queue = deque(executor.submit(read_forecast_verification_pair, *pair, *args) for pair in itertools.islice(pairs, prefetch))
+        while queue:
+            future = queue.popleft()
+            pair   = next(pairs, None)
+            if pair is not None: queue.append(executor.submit(read_forecast_verification_pair, *pair, *args))
+            yield future.result()
+
+
+def calc_forecast_and_reference_error_from_pair(score_type, forecast, verification, pval=0.9):
+    """
+    calculates xy mean forecast and reference error for skill scores from
+    forecast and verification of read_forecast_verification_pair
+    """
+    forecast_error_xy, reference_error_xy = calc_error_terms_xy(score_type, forecast, verification, pval)
+    return misc.xy_mean(forecast_error_xy).values, misc.xy_mean(reference_error_xy).values
+
+
+def calc_forecast_and_reference_error(score_type, filename_verification, filename_forecast, variable, box_sizes_temp, grid,pval=0.9):
+    """
+    calculates forecast and reference error for skill scores
+    """
+    forecast, verification = read_forecast_verification_pair(filename_verification, filename_forecast, variable, box_sizes_temp, grid)
+    return calc_forecast_and_reference_error_from_pair(score_type, forecast, verification, pval)
+
+
+def calc_error_terms_xy(score_type, forecast, verification, pval=0.9):
+    """
+    calculates forecast and reference error at each grid point for skill scores
+    """
     if score_type == 'fmsess':
         forecast_error_xy  = (forecast - verification) ** 2
         reference_error_xy = (verification) ** 2
@@ -528,36 +1021,452 @@ def calc_forecast_and_reference_error(score_type, filename_verification, filenam
         elif pval < 0.5: climatological_probability = pval # if 10th quantile, then probability 10%
         forecast_error_xy  = (forecast - verification) ** 2
         reference_error_xy = (climatological_probability - verification) ** 2
-    
-    verification.close()
-    forecast.close()
 
-    return misc.xy_mean(forecast_error_xy).values, misc.xy_mean(reference_error_xy).values
+    return forecast_error_xy, reference_error_xy
+
+
+def calc_forecast_and_reference_error_from_store(score_type, filename_verification, filename_forecast, variable, box_sizes_temp, grid, forecast_dates, pval=0.9):
+    """
+    Same as calc_forecast_and_reference_error but for all forecast_dates at 
+    once from the consolidated zarr stores or reference indexes of store.py. 
+    Both are opened lazily once and the xy mean errors are reduced across 
+    dates with dask.
+    Returns forecast and reference error arrays (forecast_dates,box_size,time).
+    """
+    forecast     = store.open_store(filename_forecast, forecast_dates)[variable]
+    verification = store.open_store(filename_verification, forecast_dates)[variable]
+
+    # see calc_forecast_and_reference_error for the 0.5x0.5 box sizes
+    if grid == '0.5x0.5':
+        forecast                 = forecast.sel(box_size=box_sizes_temp,method='nearest')
+        verification             = verification.sel(box_size=box_sizes_temp,method='nearest')
+        forecast['box_size']     = box_sizes_temp
+        verification['box_size'] = box_sizes_temp
+    else:
+        forecast     = forecast.sel(box_size=box_sizes_temp)
+        verification = verification.sel(box_size=box_sizes_temp)
+
+    forecast                              = convert_count_to_probability(forecast)
+    forecast_error_xy, reference_error_xy = calc_error_terms_xy(score_type, forecast, verification, pval)
+
+    # one compute for both errors so each chunk is read once
+    error = xr.Dataset(dict(forecast_error=misc.xy_mean(forecast_error_xy), reference_error=misc.xy_mean(reference_error_xy)))
+    error = error.transpose('forecast_date','box_size','time').compute()
+
+    return error['forecast_error'].values, error['reference_error'].values
 
 
 def calc_forecast_and_reference_error_xy(score_type, filename_verification, filename_forecast, variable, box_size, lead_time, pval=0.9):
     """
     calculates forecast and reference error for fractional skill score
     """
-    # read data 
-    verification = xr.open_dataset(filename_verification)[variable].sel(box_size=box_size).isel(time=lead_time-1).squeeze()
-    forecast     = xr.open_dataset(filename_forecast)[variable].sel(box_size=box_size).isel(time=lead_time-1).squeeze()
-    
-    # calculate error terms
+    forecast, verification = read_forecast_verification_pair(filename_verification, filename_forecast, variable, box_size, None, lead_time)
+    return calc_forecast_and_reference_error_xy_from_pair(score_type, forecast, verification, pval)
+
+
+def calc_forecast_and_reference_error_xy_from_pair(score_type, forecast, verification, pval=0.9):
+    """
+    calculates forecast and reference error at each grid point for fractional 
+    skill score from forecast and verification of read_forecast_verification_pair
+    """
+    forecast_error_xy, reference_error_xy = calc_error_terms_xy(score_type, forecast, verification, pval)
+    return forecast_error_xy.values, reference_error_xy.values
+
+
+
+def calc_anomaly_from_values(filename_forecast, filename_hindcast, variable, grid, time_flag, dim):
+    """
+    Calculates unsmoothed anomalies of forecast format values relative to
+    the climatological mean of the corresponding hindcast format values, as
+    in process/s2s/calc-anomaly-forecast.py and process/era5/calc-anomaly-forecast-format.py.
+    The ensemble mean is taken for s2s data with a 'number' dimension.
+    """
+    # read forecast and hindcast format data from specific domain
+    forecast = xr.open_dataset(filename_forecast).sel(latitude=dim.latitude, longitude=dim.longitude, method='nearest')[variable]
+    hindcast = xr.open_dataset(filename_hindcast).sel(latitude=dim.latitude, longitude=dim.longitude, method='nearest')[variable]
+
+    # calculate hindcast climatology and forecast ensemble mean
+    if 'number' in forecast.dims: forecast = forecast.mean(dim='number')
+    if 'number' in hindcast.dims: hindcast = hindcast.mean(dim='number')
+    hindcast = hindcast.mean(dim='hdate')
+
+    # resample to weekly if applicable
+    forecast = resample_daily_to_weekly(forecast, time_flag, grid, variable)
+    hindcast = resample_daily_to_weekly(hindcast, time_flag, grid, variable)
+
+    anomaly = (forecast - hindcast).load()
+
+    forecast.close()
+    hindcast.close()
+
+    return anomaly
+
+
+def check_grid_smoothed_from_values(grid):
+    """
+    The box sizes of the 0.5x0.5 grid are mapped onto the nearest box sizes 
+    of the smoothed files in calc_forecast_and_reference_error. There are no
+    such files when smoothing from values, so that grid is not supported.
+    """
+    if grid == '0.5x0.5':
+        raise ValueError("grid '0.5x0.5' maps box sizes onto those of the smoothed files, use calc_forecast_and_reference_error")
+    return
+
+
+def calc_fmsess_error_from_anomaly(forecast_anomaly, verification_anomaly, box_sizes, method='summed_area_table', workers=1, grid=None):
+    """
+    Calculates the fmsess forecast and reference error (xy mean) for all box sizes
+    directly from unsmoothed (time, latitude, longitude) anomalies without writing
+    smoothed anomalies to file. The boxcar smoother is linear, so the smoothed
+    forecast minus the smoothed verification equals the smoothed difference.
+    Only the difference and the verification are smoothed, one box size at a time.
+    Output is the same as calc_forecast_and_reference_error, except for grid
+    '0.5x0.5' which raises a ValueError (see check_grid_smoothed_from_values).
+    """
+    check_grid_smoothed_from_values(grid)
+    forecast_anomaly, verification_anomaly = xr.align(forecast_anomaly, verification_anomaly)
+    difference                             = forecast_anomaly - verification_anomaly
+
+    forecast_error      = np.zeros((box_sizes.size, difference.time.size))
+    reference_error     = np.zeros((box_sizes.size, difference.time.size))
+    difference_smooth   = iter_boxcar_smooth(difference, box_sizes, 'xarray', method=method, workers=workers)
+    verification_smooth = iter_boxcar_smooth(verification_anomaly, box_sizes, 'xarray', method=method, workers=workers)
+
+    for bs, ((_, difference_temp), (_, verification_temp)) in enumerate(zip(difference_smooth, verification_smooth)):
+        forecast_error[bs, :]  = misc.xy_mean(difference_temp ** 2).values
+        reference_error[bs, :] = misc.xy_mean(verification_temp ** 2).values
+
+    return forecast_error, reference_error
+
+
+
+def sample_quantile(values, pvals, axis=0, overwrite_input=False):
+    """
+    Quantile(s) pvals of values along axis, identical to np.quantile with
+    the default linear method for finite values. Only the order statistics
+    bracketing each quantile are needed, so the sample is partitioned once
+    at the lower rank of every pval and the upper rank is the minimum of the
+    next partition block. The sample axis is moved last and copied unless
+    overwrite_input, in which case a contiguous values is partitioned in place.
+    Returns an array without the sample axis, with a leading pval axis if
+    pvals is a list.
+    """
+    values = np.moveaxis(values, axis, -1)
+    if overwrite_input: values = np.ascontiguousarray(values)
+    else: values = np.array(values, order='C', copy=True)
+
+    number_samples = values.shape[-1]
+    ranks          = [get_quantile_ranks(number_samples, pval) for pval in np.atleast_1d(pvals)]
+    kth            = sorted(set(lo for lo, hi, gamma in ranks))
+    values.partition(kth, axis=-1)
+
+    quantiles = []
+    for lo, hi, gamma in ranks:
+        lo_values = values[..., lo]
+        if hi == lo: hi_values = lo_values
+        else:
+            next_kth  = min([k for k in kth if k > lo], default=number_samples - 1)
+            hi_values = values[..., hi:next_kth + 1].min(axis=-1) # hi'th order statistic
+        quantiles.append(interpolate_quantile(lo_values, hi_values, gamma))
+
+    if np.ndim(pvals) == 0: return quantiles[0]
+    else: return np.stack(quantiles)
+
+
+def calc_hindcast_quantile(hindcast, pval, time):
+    """
+    Calculates the pval quantile of a (smoothed) hindcast over its sample
+    dimensions, i.e. hdate and, for s2s data, number. Output is a
+    (time, latitude, longitude) DataArray with the given time coordinate
+    so that it matches the forecast. If pval is a list, the output has
+    a leading pval dimension. The hindcast is copied once into the
+    (time, latitude, longitude, sample) layout, which is then partitioned in
+    place; the input hindcast is not modified.
+    """
+    sample_dims = [d for d in ('hdate', 'number') if d in hindcast.dims]
+    values      = hindcast.transpose('time', 'latitude', 'longitude', *sample_dims).values
+    values      = values.reshape(values.shape[:3] + (-1,)) # concatenate hdate and number dims for sample
+    if np.shares_memory(values, hindcast.values): values = values.copy() # already in this layout, reshape is a view
+    coords      = dict(time=time, latitude=hindcast.latitude, longitude=hindcast.longitude)
+    dims        = ['time', 'latitude', 'longitude']
+    if np.ndim(pval) > 0: coords, dims = dict(pval=np.asarray(pval), **coords), ['pval'] + dims
+    return xr.DataArray(sample_quantile(values, pval, axis=-1, overwrite_input=True), coords=coords, dims=dims)
+
+
+def calc_exceedance_count(forecast, quantile, pval):
+    """
+    Counts the s2s ensemble members above (pval > 0.5) or below (pval <= 0.5)
+    a quantile, streaming over members so that only one (time, latitude,
+    longitude) boolean field exists at a time. Counts are uint8 (uint16 for
+    more than 255 members) with the ensemble size in attrs['number'].
+    """
+    members = forecast.transpose('number', 'time', 'latitude', 'longitude').values
+    values  = quantile.transpose('time', 'latitude', 'longitude').values
+    dtype   = np.uint8 if members.shape[0] <= np.iinfo(np.uint8).max else np.uint16
+    count   = np.zeros(values.shape, dtype=dtype)
+    for member in members:
+        if pval > 0.5: count += member >= values
+        elif pval <= 0.5: count += member < values
+    coords = dict(time=quantile.time, latitude=quantile.latitude, longitude=quantile.longitude)
+    return xr.DataArray(count, coords=coords, dims=['time', 'latitude', 'longitude'], attrs=dict(number=members.shape[0]))
+
+
+def calc_probability(forecast, quantile, pval):
+    """
+    Converts a s2s forecast into the probability (fraction of ensemble members)
+    above (pval > 0.5) or below (pval <= 0.5) a quantile.
+    """
+    return convert_count_to_probability(calc_exceedance_count(forecast, quantile, pval))
+
+
+def convert_count_to_probability(da):
+    """
+    Converts ensemble member counts (integer data with the ensemble size in
+    attrs['number'], as written by calc-probability-forecast.py) to
+    probability. Any other data is returned unchanged.
+    """
+    if np.issubdtype(da.dtype, np.integer) and 'number' in da.attrs:
+        number = da.attrs['number']
+        da     = da / number
+        da.attrs.pop('number', None)
+    return da
+
+
+def calc_binary(forecast, quantile, pval):
+    """
+    Converts an era5 forecast format field into binary 1's and 0's above
+    (pval > 0.5) or below (pval <= 0.5) a quantile. The comparison is
+    written directly into uint8.
+    """
+    values = forecast.transpose('time', 'latitude', 'longitude').values
+    if pval > 0.5: binary = values >= quantile.transpose('time', 'latitude', 'longitude').values
+    elif pval <= 0.5: binary = values <= quantile.transpose('time', 'latitude', 'longitude').values
+    coords = dict(time=forecast.time, latitude=forecast.latitude, longitude=forecast.longitude)
+    return xr.DataArray(binary.view(np.uint8), coords=coords, dims=['time', 'latitude', 'longitude'])
+
+
+# (units, long_name) of the smoothed products per variable, as written by the process scripts
+product_attrs = {'anomaly':{'tp24':('m','anomalies of daily accumulated precipitation'),
+                            't2m24':('K','anomalies of daily-mean 2-meter temperature'),
+                            'rn24':('m','anomalies of daily accumulated rainfall'),
+                            'mx24tpr':('kg m**-2 s**-1','anomalies of daily maximum timestep precipitation rate'),
+                            'mx24tp6':('m','anomalies of daily maximum 6 hour accumulated precipitation'),
+                            'mx24rn6':('m','anomalies of daily maximum 6 hour accumulated rainfall')},
+                 'probability':{'tp24':('ensemble members','number of ensemble members of daily accumulated precipitation over quantile pval'),
+                                't2m24':('ensemble members','number of ensemble members of daily-mean temperature over quantile pval'),
+                                'rn24':('ensemble members','number of ensemble members of daily accumulated rain over quantile pval')},
+                 'binary':{'tp24':('unitless','binary daily accumulated precipitation over quantile pval'),
+                           't2m24':('unitless','binary daily-mean temperature over quantile pval'),
+                           'rn24':('unitless','binary daily accumulated rain over quantile pval')}
+}
+
+
+def set_product_attrs(da, product, variable):
+    """
+    Sets the units and long_name of variable for product ('anomaly', 
+    'probability' or 'binary') from product_attrs, if listed.
+    """
+    if variable in product_attrs[product]:
+        da.attrs['units'], da.attrs['long_name'] = product_attrs[product][variable]
+    return da
+
+
+def set_binary_flag_attrs(binary):
+    """
+    Flag value encoding of a uint8 binary field, see calc_binary.
+    """
+    binary.attrs['flag_values']   = np.array([0, 1], dtype=np.uint8)
+    binary.attrs['flag_meanings'] = 'not_exceeding_quantile exceeding_quantile'
+    return binary
+
+
+def get_efi_weights(dq):
+    """
+    Returns the quantile levels q = dq, 2dq, .., 1-dq of the extreme forecast
+    index integral and its Anderson-Darling weights dq/sqrt(q(1-q)).
+    """
+    q = np.arange(dq,1.0,dq)
+    return q, dq/np.sqrt(q*(1.0-q))
+
+
+def searchsorted_quantile_table(table, values):
+    """
+    Vectorized np.searchsorted(table[:,i], values[i], side='right') for every
+    gridpoint i, i.e. the number of entries in the (monotone) quantile table
+    that are <= values. table has dimensions (quantile, ...) and values (...).
+    Binary search with a fixed number of steps over all gridpoints at once.
+    """
+    nq      = table.shape[0]
+    table   = table.reshape(nq, -1)
+    values  = values.reshape(-1)
+    points  = np.arange(values.size)
+    lo      = np.zeros(values.size, dtype=np.int64)
+    hi      = np.full(values.size, nq, dtype=np.int64)
+    for _ in range(int(np.ceil(np.log2(nq + 1)))):
+        active = lo < hi
+        mid    = np.minimum((lo + hi) // 2, nq - 1)
+        below  = active & (table[mid, points] <= values)
+        lo     = np.where(below, mid + 1, lo)
+        hi     = np.where(active & ~below, mid, hi)
+    return lo
+
+
+def calc_efi_values(forecast, hindcast, q, weights):
+    """
+    Extreme forecast index of one box size from numpy arrays forecast
+    (number, time, lat, lon) and hindcast (sample, time, lat, lon).
+    The hindcast quantiles are taken from the sorted sample as np.quantile.
+    The fraction of members below each hindcast quantile is never formed: for
+    each member the quantile table is searched once and the weights of all
+    quantiles above the member value are added, accumulating in float32.
+    """
+    hindcast    = np.sort(hindcast, axis=0) # sort once, then every quantile is an interpolation between two ranks
+    qx          = np.empty(q.shape + hindcast.shape[1:], dtype=hindcast.dtype)
+    for i in range(q.size):
+        lo, hi, gamma = get_quantile_ranks(hindcast.shape[0], q[i])
+        qx[i]         = interpolate_quantile(hindcast[lo], hindcast[hi], gamma)
+    tail_weight = np.append(np.cumsum(weights[::-1])[::-1], 0.0).astype(np.float32) # sum of weights[k:]
+    efi         = np.zeros(forecast.shape[1:], dtype=np.float32)
+    for member in forecast:
+        efi += tail_weight[searchsorted_quantile_table(qx, member)].reshape(efi.shape)
+    efi /= forecast.shape[0]
+    efi  = np.float32(np.sum(q*weights)) - efi
+    efi *= np.float32(2.0/np.pi)
+    return efi
+
+
+def extreme_forecast_index(forecast, hindcast, dq=0.01, workers=1):
+    """
+    Calculates the ecmwf extreme forecast index of a smoothed forecast
+    (box_size, [number], time, latitude, longitude) relative to the quantiles
+    of a smoothed hindcast (box_size, hdate, [number], time, latitude, longitude).
+    Without a number dimension (era5) the forecast is a single member.
+    Box sizes are split across workers threads.
+    """
+    sample_dims = [d for d in ('hdate', 'number') if d in hindcast.dims]
+    hindcast    = hindcast.transpose('box_size', *sample_dims, 'time', 'latitude', 'longitude')
+    if 'number' in forecast.dims: forecast = forecast.transpose('box_size', 'number', 'time', 'latitude', 'longitude')
+    else: forecast = forecast.transpose('box_size', 'time', 'latitude', 'longitude').expand_dims('number', axis=1)
+
+    q, weights = get_efi_weights(dq)
+    coords     = dict(box_size=forecast.box_size, time=forecast.time, latitude=forecast.latitude, longitude=forecast.longitude)
+    attrs      = dict(description='ecmwf extreme forecast index', units='none: 0-1')
+    efi        = xr.DataArray(np.zeros((forecast.box_size.size,) + forecast.shape[2:], dtype=np.float32), coords=coords,
+                              dims=['box_size', 'time', 'latitude', 'longitude'], attrs=attrs, name='EFI')
+
+    def calc_efi_box_size(bs):
+        hindcast_values = hindcast[bs].values
+        hindcast_values = hindcast_values.reshape((-1,) + hindcast_values.shape[-3:]) # concatenate hdate and number dims for sample
+        efi.values[bs]  = calc_efi_values(forecast[bs].values, hindcast_values, q, weights)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(calc_efi_box_size, range(forecast.box_size.size)))
+
+    return efi
+
+
+def read_forecast_format(filename, variable, grid, time_flag, dim):
+    """
+    Reads forecast or hindcast format values over the domain in dim and
+    resamples to weekly if applicable.
+    """
+    da = xr.open_dataset(filename).sel(latitude=dim.latitude, longitude=dim.longitude, method='nearest')[variable]
+    da = resample_daily_to_weekly(da, time_flag, grid, variable).load()
+    return da
+
+
+def calc_forecast_and_reference_error_from_values(score_type, date, variable, grid, time_flag, domain, box_sizes, pval=0.9, method='summed_area_table', workers=1, write2file=False):
+    """
+    End-to-end in-memory pipeline from the daily s2s and era5 forecast and
+    hindcast format values of one forecast date to the forecast and reference
+    error (box_size, time) of the fmsess or fbss. Output is the same as
+    calc_forecast_and_reference_error on the smoothed anomaly or
+    probability/binary files, but the fields are smoothed and reduced one box
+    size at a time and nothing is read back from disk.
+
+    write2file = True also writes the smoothed anomaly or probability/binary
+    fields to the same directories and files as the process scripts. The
+    0.5x0.5 grid is not supported (see check_grid_smoothed_from_values).
+    """
+    check_grid_smoothed_from_values(grid)
+    dim                   = get_data_dimensions(grid, time_flag, domain)
+    filename              = variable + '_' + grid + '_' + date + '.nc'
+    filename_forecast     = config.dirs['s2s_forecast_daily'] + variable + '/' + filename
+    filename_hindcast     = config.dirs['s2s_hindcast_daily'] + variable + '/' + filename
+    filename_verification = config.dirs['era5_forecast_daily'] + variable + '/' + filename
+    filename_verification_hindcast = config.dirs['era5_hindcast_daily'] + variable + '/' + filename
+
     if score_type == 'fmsess':
-        forecast_error_xy  = (forecast - verification) ** 2
-        reference_error_xy = (verification) ** 2
+
+        forecast     = calc_anomaly_from_values(filename_forecast, filename_hindcast, variable, grid, time_flag, dim)
+        verification = calc_anomaly_from_values(filename_verification, filename_verification_hindcast, variable, grid, time_flag, dim)
+        if not write2file:
+            return calc_fmsess_error_from_anomaly(forecast, verification, box_sizes, method=method, workers=workers, grid=grid)
+
+        # smooth all box sizes to keep the intermediate files
+        forecast     = boxcar_smoother_xy_optimized(box_sizes, forecast, 'xarray', method=method, dtype='float32', workers=workers).rename(variable)
+        verification = boxcar_smoother_xy_optimized(box_sizes, verification, 'xarray', method=method, dtype='float32', workers=workers).rename(variable)
+        forecast     = set_product_attrs(forecast, 'anomaly', variable)
+        verification = set_product_attrs(verification, 'anomaly', variable)
+        path_out_forecast     = config.dirs['s2s_forecast_' + time_flag + '_anomaly'] + '/' + domain + '/' + variable + '/'
+        path_out_verification = config.dirs['era5_forecast_' + time_flag + '_anomaly'] + '/' + domain + '/' + variable + '/'
+        misc.to_netcdf_with_packing_and_compression(forecast, path_out_forecast + filename, chunksizes=config.chunks['anomaly'])
+        misc.to_netcdf_with_packing_and_compression(verification, path_out_verification + filename, chunksizes=config.chunks['anomaly'])
+
+        forecast_error  = misc.xy_mean((forecast - verification) ** 2).values
+        reference_error = misc.xy_mean(verification ** 2).values
 
     elif score_type == 'fbss':
+
         if pval > 0.5: climatological_probability = 1 - pval # e.g. if 90th quantile, then probability is 10%
         elif pval < 0.5: climatological_probability = pval # if 10th quantile, then probability 10%
-        forecast_error_xy  = (forecast - verification) ** 2
-        reference_error_xy = (climatological_probability - verification) ** 2
 
-    verification.close()
-    forecast.close()
+        forecast              = read_forecast_format(filename_forecast, variable, grid, time_flag, dim)
+        hindcast              = read_forecast_format(filename_hindcast, variable, grid, time_flag, dim)
+        verification          = read_forecast_format(filename_verification, variable, grid, time_flag, dim)
+        verification_hindcast = read_forecast_format(filename_verification_hindcast, variable, grid, time_flag, dim)
 
-    return forecast_error_xy.values, reference_error_xy.values
+        forecast_smooth              = iter_boxcar_smooth(forecast, box_sizes, 'xarray', method=method, dtype='float32', workers=workers)
+        hindcast_smooth              = iter_boxcar_smooth(hindcast, box_sizes, 'xarray', method=method, dtype='float32', workers=workers)
+        verification_smooth          = iter_boxcar_smooth(verification, box_sizes, 'xarray', method=method, dtype='float32', workers=workers)
+        verification_hindcast_smooth = iter_boxcar_smooth(verification_hindcast, box_sizes, 'xarray', method=method, dtype='float32', workers=workers)
+
+        forecast_error  = np.zeros((box_sizes.size, verification.time.size))
+        reference_error = np.zeros((box_sizes.size, verification.time.size))
+        if write2file:
+            shape       = (box_sizes.size, verification.time.size, verification.latitude.size, verification.longitude.size)
+            coords      = dict(box_size=box_sizes, time=verification.time, latitude=verification.latitude, longitude=verification.longitude)
+            dims        = ['box_size', 'time', 'latitude', 'longitude']
+            count_dtype = np.uint8 if forecast['number'].size <= np.iinfo(np.uint8).max else np.uint16
+            probability = xr.DataArray(np.zeros(shape, dtype=count_dtype), coords=coords, dims=dims, name=variable)
+            binary      = xr.DataArray(np.zeros(shape, dtype=np.uint8), coords=coords, dims=dims, name=variable)
+
+        for bs, smooth in enumerate(zip(forecast_smooth, hindcast_smooth, verification_smooth, verification_hindcast_smooth)):
+            [(_, forecast_temp), (_, hindcast_temp), (_, verification_temp), (_, verification_hindcast_temp)] = smooth
+
+            quantile         = calc_hindcast_quantile(hindcast_temp, pval, forecast_temp.time)
+            count_temp       = calc_exceedance_count(forecast_temp, quantile, pval)
+            probability_temp = convert_count_to_probability(count_temp)
+            quantile         = calc_hindcast_quantile(verification_hindcast_temp, pval, verification_temp.time)
+            binary_temp      = calc_binary(verification_temp, quantile, pval)
+
+            forecast_error[bs, :]  = misc.xy_mean((probability_temp - binary_temp) ** 2).values
+            reference_error[bs, :] = misc.xy_mean((climatological_probability - binary_temp) ** 2).values
+
+            if write2file:
+                probability[bs, ...] = count_temp.values
+                binary[bs, ...]      = binary_temp.values
+
+        if write2file:
+            probability.attrs['number'] = count_temp.attrs['number']
+            probability                 = set_product_attrs(probability, 'probability', variable)
+            binary                      = set_product_attrs(set_binary_flag_attrs(binary), 'binary', variable)
+            path_out_forecast     = config.dirs['s2s_forecast_' + time_flag + '_probability'] + str(pval) + '/' + domain + '/' + variable + '/'
+            path_out_verification = config.dirs['era5_forecast_' + time_flag + '_binary'] + str(pval) + '/' + domain + '/' + variable + '/'
+            misc.to_netcdf_with_compression(probability, 5, path_out_forecast, filename, chunksizes=config.chunks['probability']) # exact counts, no packing
+            misc.to_netcdf_with_compression(binary, 5, path_out_verification, filename, chunksizes=config.chunks['binary']) # uint8 flags, no packing
+
+    return forecast_error, reference_error
 
 
 
@@ -566,7 +1475,7 @@ def write_score_to_file(score, score_bootstrap, sig, forecast_error, reference_e
     if write2file:
         forecast_error  = forecast_error.rename('forecast_error')
         reference_error = reference_error.rename('reference_error')
-        ds              = xr.merge([score, score_bootstrap, sig, forecast_error, reference_error])
+        ds              = xr.merge([da for da in [score, score_bootstrap, sig, forecast_error, reference_error] if da is not None]) # score_bootstrap is optional
         if grid == '0.5x0.5': ds['box_size'] = box_sizes
         #misc.to_netcdf_with_packing_and_compression(ds, path_out + filename_out)
         ds.to_netcdf(path_out + filename_out)
@@ -585,6 +1494,26 @@ def write_score_to_file_xy(score, sig, write2file, filename_out, path_out):
 
 
 
+def calc_lead_time_gained_from_score(score_interp, time_interp):
+    """calculates the lead time gained of each box size from a score already
+    interpolated in time. score_interp has dimensions (..., box_size, time) so
+    that e.g. all bootstrap samples can be done in one call. For every time t,
+    the isoline search (argmin of the absolute score difference to the grid
+    scale curve) is broadcast over all t at once instead of looping""" 
+
+    lead_time_gained = np.zeros(score_interp.shape)
+    score_grid       = score_interp[...,0,np.newaxis,:] # (..., 1, time) grid scale curve
+    for bs in range(1,score_interp.shape[-2]):
+        # finds the equivalent score at a larger box size to the smallest box size (i.e. tracks the isoline of equal score)
+        index                          = np.nanargmin(np.absolute(score_interp[...,bs,:,np.newaxis] - score_grid),axis=-1)
+        lead_time_gained[...,bs,:]     = time_interp - time_interp[index]
+        # where there is no skill equivalent at grid resolution
+        lead_time_gained[...,bs,:][time_interp[index] == 1.0] = np.nan 
+
+    return lead_time_gained
+
+
+
 def calc_lead_time_gained(filename, dt):
     """calculates the lead time gained (or lost) of increasing the spatial
     scale of the forecast for a given skill level at the grid scale""" 
@@ -602,15 +1531,7 @@ def calc_lead_time_gained(filename, dt):
     box_size     = score.box_size
 
     # calculate lead time gained 
-    lead_time_gained = np.zeros(score_interp.shape)
-    for bs in range(1,box_size.size):
-        for t in range(0,time_interp.size):
-            # finds the equivalent score at a larger box size to the smallest box size (i.e. tracks the isoline of equal score)
-            index = np.nanargmin(np.absolute(score_interp[bs,t] - score_interp[0,:]))
-            if time_interp[index] == 1.0: # where there is no skill equivalent at grid resolution
-                lead_time_gained[bs,t] = np.nan
-            else:
-                lead_time_gained[bs,t] = time_interp[t] - time_interp[index]
+    lead_time_gained = calc_lead_time_gained_from_score(score_interp, time_interp)
 
     # calculate maximum skill not acheivable at the grid scale
     # i.e. convert not achievable to 1.0, and achievable to np.nan
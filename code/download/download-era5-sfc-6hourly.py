@@ -84,42 +84,42 @@ for variable in variables:
                 ds = xr.open_dataset(path + filename)
 
                 if variable == 'mx6tpr':
-                        ds                              = ds.resample(time='6h').max('time')
+                        ds                              = misc.resample_fixed_cadence(ds,'6h','max')
                         ds                              = ds.rename({'mxtpr':variable})  
                         ds[variable].attrs['long_name'] = '6-hourly maximum precipitation rate'                
                         ds[variable].attrs['units']     = 'kg m**-2 s**-1'
                 elif variable == 'swh6':
-                        ds                              = ds.resample(time='6h').mean('time')
+                        ds                              = misc.resample_fixed_cadence(ds,'6h','mean')
                         ds                              = ds.rename({'swh':variable})
                         ds[variable].attrs['long_name'] = '6-hourly mean significant height of combined wind waves and swell'
                         ds[variable].attrs['units']     = 'm'                        
                 elif variable == 'mwd6':
-                        ds                              = ds.resample(time='6h').mean('time')
+                        ds                              = misc.resample_fixed_cadence(ds,'6h','mean')
                         ds                              = ds.rename({'mwd':variable})
                         ds[variable].attrs['long_name'] = '6-hourly mean mean wave direction'
                         ds[variable].attrs['units']     = 'degrees'
                 elif variable == 'hmax6':
-                        ds                              = ds.resample(time='6h').max('time')
+                        ds                              = misc.resample_fixed_cadence(ds,'6h','max')
                         ds                              = ds.rename({'hmax':variable})
                         ds[variable].attrs['long_name'] = '6-hourly maximum individual wave height'
                         ds[variable].attrs['units']     = 'm'
                 elif variable == 'bfi6':
-                        ds                              = ds.resample(time='6h').max('time')
+                        ds                              = misc.resample_fixed_cadence(ds,'6h','max')
                         ds                              = ds.rename({'bfi':variable})
                         ds[variable].attrs['long_name'] = '6-hourly maximum benjamin-feir index'
                         ds[variable].attrs['units']     = 'unitless'                        
                 elif variable == 'u10m6':
-                        ds                              = ds.resample(time='6h').mean('time')
+                        ds                              = misc.resample_fixed_cadence(ds,'6h','mean')
                         ds                              = ds.rename({'u10':variable})
                         ds[variable].attrs['long_name'] = '6-hourly mean 10m u component of wind'
                         ds[variable].attrs['units']     = 'unitless'                        
                 elif variable == 'v10m6':
-                        ds                              = ds.resample(time='6h').mean('time')
+                        ds                              = misc.resample_fixed_cadence(ds,'6h','mean')
                         ds                              = ds.rename({'v10':variable})
                         ds[variable].attrs['long_name'] = '6-hourly mean 10m v component of wind'
                         ds[variable].attrs['units']     = 'unitless'
                 elif variable == 't2m6':
-                        ds                              = ds.resample(time='6h').mean('time')
+                        ds                              = misc.resample_fixed_cadence(ds,'6h','mean')
                         ds                              = ds.rename({'t2m':variable})
                         ds[variable].attrs['long_name'] = '6-hourly mean 2m temperature'
                         ds[variable].attrs['units']     = 'K'
@@ -136,13 +136,9 @@ for variable in variables:
                         filename_out = variable + '_' + gridstring + '_' + str(year) + '.nc'
                         ds           = xr.open_mfdataset(path + filenames)
                         with ProgressBar(): ds = ds.compute()
-                        ds.to_netcdf(path + filename_out)
+                        misc.to_netcdf_with_compression(ds,comp_lev,path,filename_out)
                         ds.close()
                         os.system('rm ' + path + filenames)
 
-                        print('compress files to reduce space..')
-                        print('')
-                        misc.compress_file(comp_lev,3,filename_out,path)
-
 
 
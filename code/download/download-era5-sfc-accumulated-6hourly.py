@@ -92,13 +92,13 @@ for variable in variables:
                 ds['time'] = ds.time - np.timedelta64(1,'h') # shift time to put all required data on same day
 
                 if variable == 'tp6':
-                        ds                              = ds.resample(time='6h').sum('time')
+                        ds                              = misc.resample_fixed_cadence(ds,'6h','sum')
                         ds                              = ds.isel(time=slice(1,5))
                         ds                              = ds.rename({'tp':variable})
                         ds[variable].attrs['long_name'] = '6-hourly accumulated precipitation'
                         ds[variable].attrs['units']     = 'm'
                 elif variable == 'sf6':
-                        ds                              = ds.resample(time='6h').sum('time')
+                        ds                              = misc.resample_fixed_cadence(ds,'6h','sum')
                         ds                              = ds.isel(time=slice(1,5))
                         ds                              = ds.rename({'sf':variable})
                         ds[variable].attrs['long_name'] = '6-hourly accumulated snowfall'
@@ -120,13 +120,9 @@ for variable in variables:
 
                         with ProgressBar():
                                 ds = ds.compute()
-                        ds.to_netcdf(path + filename_out)
+                        misc.to_netcdf_with_compression(ds,comp_lev,path,filename_out)
                         ds.close()
                         os.system('rm ' + path + filenames)
 
-                        print('compress files to reduce space..')
-                        print('')
-                        misc.compress_file(comp_lev,3,filename_out,path)
-
 
 
@@ -151,10 +151,7 @@ if write2file:
 
                 print('convert grib to netcdf..')
                 combined_data = s2s.convert_grib_to_netcdf(path + filename1_grb, path + filename2_grb,dtype)
-                combined_data.to_netcdf(path + filename_nc,format='NETCDF4_CLASSIC')
-
-                print('compress files to reduce space..')
-                misc.compress_file(comp_lev,4,filename_nc,path)
+                misc.to_netcdf_with_compression(combined_data,comp_lev,path,filename_nc,format='NETCDF4_CLASSIC')
 
                 print('delete old files..')
                 os.system('rm ' + path + filename1_grb)
@@ -16,7 +16,7 @@ import xarray as xr
 import pandas as pd
 from dask.diagnostics   import ProgressBar
 import os
-from Dunnsigouin_etal_2025 import config,misc,s2s
+from Dunnsigouin_etal_2025 import config,misc,s2s,era5
 
 # INPUT -----------------------------------------------
 variables           = ['t2m24']             # tp24,rn24,mx24rn6,mx24tp6,mx24tpr
@@ -24,6 +24,7 @@ first_forecast_date = '20200102'           # first initialization date of foreca
 number_forecasts    = 209                    # number of forecasts   
 season              = 'annual'
 grids               = ['day1to46_0.5x0.5']        # '0.25x0.25' or '0.5x0.5'
+use_store           = False                 # read windows from the era5 daily store (see calc-daily-store-from-yearly.py)
 write2file          = True
 # -----------------------------------------------------         
 
@@ -59,7 +60,9 @@ for variable in variables:
             elif grid == 'day1to46_0.5x0.5': era5_dates = pd.date_range(date,periods=46,freq="D")
             
             # calculate explicitely
-            with ProgressBar(): ds = xr.open_mfdataset([path_in + filename1_in,path_in + filename2_in]).sel(time=era5_dates).compute()
+            if use_store: ds = era5.era5_window(variable,grid,era5_dates[0],era5_dates.size).to_dataset()
+            else:
+                with ProgressBar(): ds = xr.open_mfdataset([path_in + filename1_in,path_in + filename2_in]).sel(time=era5_dates).compute()
             #with ProgressBar(): ds = xr.open_mfdataset(path_in + filename1_in).sel(time=era5_dates).compute()
             
             # write to file
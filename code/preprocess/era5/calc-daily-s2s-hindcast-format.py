@@ -16,7 +16,7 @@ import xarray as xr
 import pandas as pd
 from dask.diagnostics   import ProgressBar
 import os
-from Dunnsigouin_etal_2025 import config,misc,s2s
+from Dunnsigouin_etal_2025 import config,misc,s2s,era5
 
 
 def initialize_hindcast_array(date,number_hdate,variable,dim):
@@ -54,6 +54,26 @@ def initialize_hindcast_array(date,number_hdate,variable,dim):
 
 
 
+def load_era5_daily_cube(variable,grid,years,use_store=False):
+    """
+    Loads the daily continuous era5 yearly files of years into one in-memory
+    (time, latitude, longitude) float32 cube, read and decoded once per run.
+    With use_store the cube is instead the memory-mapped era5 daily store.
+    Returns the cube and its time index (normalized to days) used to find
+    the day offsets.
+    """
+    if use_store:
+        values, time, latitude, longitude, attrs = era5.open_era5_daily_store(variable,grid)
+        return values, pd.DatetimeIndex(time).normalize()
+
+    path_in = config.dirs['era5_daily'] + variable + '/'
+    if grid == 'day1to46_0.5x0.5': grid = '0.5x0.5'
+    filenames_in = [path_in + variable + '_' + grid + '_' + year + '.nc' for year in years]
+    with ProgressBar():
+        cube = xr.open_mfdataset(filenames_in)[variable].compute()
+    return cube.values.astype(np.float32,copy=False), pd.DatetimeIndex(cube.time.values).normalize()
+
+
 # INPUT -----------------------------------------------
 variables           = ['t2m24']             # tp24,rn24,mx24rn6,mx24tp6,mx24tpr
 first_forecast_date = '20200102'           # first initialization date of forecast (either a monday or thursday)
@@ -61,6 +81,7 @@ number_forecasts    = 209                    # number of forecasts
 number_hdate        = 20
 season              = 'annual'
 grid                = 'day1to46_0.5x0.5'        # '0.25x0.25' or '0.5x0.5'
+use_store           = False                 # read from the era5 daily store (see calc-daily-store-from-yearly.py)
 write2file          = True
 # -----------------------------------------------------         
 
@@ -69,42 +90,45 @@ forecast_dates = s2s.get_forecast_dates(first_forecast_date,number_forecasts,sea
 #forecast_dates = pd.date_range(first_forecast_date, periods=number_forecasts)
 print(forecast_dates)
 
+# years of era5 data spanning all hindcasts (incl. the following year for lead times)
+first_hdate = forecast_dates.min() - np.timedelta64(int(number_hdate*365.25),'D')
+last_hdate  = forecast_dates.max() - np.timedelta64(int(365.25),'D')
+years       = [str(year) for year in range(first_hdate.year,last_hdate.year + 2)]
+
 for variable in variables:
+
+    # read all era5 days once
+    cube, cube_time = load_era5_daily_cube(variable,grid,years,use_store)
+    
     for date in forecast_dates:
 
         print('\nvariable: ' + variable + ', date: ' + date.strftime('%Y-%m-%d'))
 
         # define some paths and strings
-        path_in      = config.dirs['era5_daily'] + variable + '/'
         path_out     = config.dirs['era5_hindcast_daily'] + variable + '/'
         datestring   = date.strftime('%Y-%m-%d')            
         filename_out = '%s_%s_%s.nc'%(variable,grid,datestring)
         dim          = misc.get_dim(grid,'time')
         hindcast     = initialize_hindcast_array(date,number_hdate,variable,dim)
 
-        # open forecast calendar dates for corresponding hindcasts
+        # day offsets into the era5 cube of the forecast calendar dates for corresponding hindcasts
+        offsets = np.zeros((number_hdate,hindcast.time.size),dtype=np.int64)
         for i in range(0,number_hdate):
 
             temp_date = date - np.timedelta64(int((i+1)*365.25),'D') # need to convert timedelta to days instead of years 
 
             # pick out specific dates (46 = # of days in ecmwf forecast)
-            if grid == '0.25x0.25': era5_dates = pd.date_range(temp_date,periods=15,freq="D").strftime('%Y-%m-%d')
-            elif grid == '0.5x0.5': era5_dates = (pd.date_range(temp_date,periods=31,freq="D") + np.timedelta64(15,'D')).strftime('%Y-%m-%d')
-            elif grid == 'day1to46_0.5x0.5': era5_dates = pd.date_range(temp_date,periods=46,freq="D").strftime('%Y-%m-%d')
-
-            # define input filenames
-            years        = pd.date_range(temp_date,periods=2,freq="Y").strftime('%Y')
-            if (grid == '0.25x0.25') or (grid == '0.5x0.5'):
-                filenames_in = path_in + variable + '_' + grid + '_' + years + '.nc'
-            elif grid == 'day1to46_0.5x0.5':
-                filenames_in = path_in + variable + '_0.5x0.5_' + years + '.nc'
-                
-            # get data corresponding to era5 dates
-            with ProgressBar():
-                hindcast[i,...] = xr.open_mfdataset(filenames_in).sel(time=era5_dates,method='nearest')[variable].compute().values
+            if grid == '0.25x0.25': era5_dates = pd.date_range(temp_date,periods=15,freq="D")
+            elif grid == '0.5x0.5': era5_dates = pd.date_range(temp_date,periods=31,freq="D") + np.timedelta64(15,'D')
+            elif grid == 'day1to46_0.5x0.5': era5_dates = pd.date_range(temp_date,periods=46,freq="D")
+
+            offsets[i,:] = cube_time.get_indexer(era5_dates.normalize())
+            if np.any(offsets[i,:] < 0):
+                raise ValueError('era5 daily data of ' + variable + ' does not cover ' + str(era5_dates[offsets[i,:] < 0].date[0]) + \
+                                 ' (hindcast of ' + date.strftime('%Y-%m-%d') + '), check years or the era5 daily store')
+
+        # get data corresponding to era5 dates
+        hindcast[...] = cube[offsets]
             
 	# write to file
         if write2file: misc.to_netcdf_with_packing_and_compression(hindcast, path_out + filename_out)
-
-        
-
@@ -0,0 +1,24 @@
+"""
+One-time conversion of the daily continuous era5 data in yearly files into
+a memory-mappable store (raw .npy plus a date index sidecar) per variable
+and grid, see Dunnsigouin_etal_2025/era5.py. The s2s forecast and hindcast
+format scripts then read 46-day windows with era5.era5_window instead of
+decompressing two full years per date.
+"""
+
+from Dunnsigouin_etal_2025 import misc,era5
+
+# INPUT -----------------------------------------------
+variables           = ['t2m24']             # tp24,rn24,mx24rn6,mx24tp6,mx24tpr
+grids               = ['0.5x0.5']           # '0.25x0.25' or '0.5x0.5' (also used for day1to46_0.5x0.5)
+first_year          = 1999                  # must cover the earliest hindcast date
+last_year           = 2024                  # must cover the last forecast date + 46 days
+# -----------------------------------------------------
+
+for variable in variables:
+    for grid in grids:
+
+        misc.tic()
+        print('\nvariable: ' + variable + ', grid: ' + grid)
+        era5.write_era5_daily_store(variable, grid, range(first_year, last_year + 1))
+        misc.toc()
@@ -22,7 +22,7 @@ first_forecast_date = '20230102' # first initialization date of forecast (either
 number_forecasts    = 51         # number of forecast initializations 
 season              = 'annual'
 grid                = '0.5x0.5'             # '0.25x0.25' or '0.5x0.5'
-comp_lev            = 5                       # level of compression with nccopy (1-10)
+comp_lev            = 5                       # level of zlib compression (1-9)
 write2file          = True
 # -----------------------------------------------------            
 
@@ -100,8 +100,7 @@ for variable in variables:
             if write2file:
                 print('writing to file..')
                 #misc.to_netcdf_pack64bit(ds[variable_out],path_out + filename_out)
-                ds.to_netcdf(path_out + filename_out)
-                misc.compress_file(comp_lev,3,filename_out,path_out)
+                misc.to_netcdf_with_compression(ds,comp_lev,path_out,filename_out)
                 print('')
                 
             ds.close()
@@ -1,15 +1,85 @@
 """
 Calculates daily quantities from 6hourly s2s ecmwf mars data (forecasts and hindcasts). 
-Also combines cf and pf files into one.
+Also combines cf and pf into one file.
 """
 
 import numpy    as np
 import xarray   as xr
 import pandas   as pd
-import os
 from Dunnsigouin_etal_2025 import config,misc,s2s
 from datetime   import datetime
 
+def calc_daily_precipitation_variables(product,basename,variables,date,grid,forecastcycle):
+    """
+    Calculates the requested daily precipitation variables (tp24, rn24,
+    mx24tp6, mx24rn6) from one read of the 6hourly tp6 (and sf6 if rain is
+    needed) file. The 6 hour shift is done once and the daily sums and
+    maxima are reductions of reshaped views of the 6hourly fields.
+    """
+    path_in = config.dirs['s2s_' + product + '_6hourly']
+    rain    = ('rn24' in variables) or ('mx24rn6' in variables)
+
+    # shift time back by 6 hours. This means that for data on day 0 with hours 0,6,12,18,24,
+    # hour 24 (accumulated from hour 18-24) is counted in day 0 not day 1. Basically,
+    # sum of hours 6,12,18,24 instead of 0,6,12,18 on a given day.
+    tp6 = xr.open_dataset(path_in + 'tp6/tp6_' + basename + '.nc')['tp6'].load()
+    tp6 = tp6.assign_coords(time=tp6.time - np.timedelta64(6,'h'))
+    if rain:
+        sf6 = xr.open_dataset(path_in + 'sf6/sf6_' + basename + '.nc')['sf6'].load()
+        sf6 = sf6.assign_coords(time=sf6.time - np.timedelta64(6,'h'))
+        rn6 = tp6 - sf6
+    
+    daily = {}
+    if ('tp24' in variables) or ('rn24' in variables): tp24 = misc.resample_fixed_cadence(tp6,'1D','sum')
+    if 'tp24' in variables:
+        daily['tp24'] = (tp24, 'daily accumulated precipitation')
+    if 'rn24' in variables: # daily accumulated rain (precip - snowfall, m)
+        daily['rn24'] = (tp24 - misc.resample_fixed_cadence(sf6,'1D','sum'), 'daily accumulated rainfall')
+    if 'mx24tp6' in variables: # daily maximum 6 hour accumulated precip (m)
+        daily['mx24tp6'] = (misc.resample_fixed_cadence(tp6,'1D','max'), 'daily maximum 6 hour accumulated precipitation')
+    if 'mx24rn6' in variables: # daily maximum 6 hour accumulated rainfall (m)
+        daily['mx24rn6'] = (misc.resample_fixed_cadence(rn6,'1D','max'), 'daily maximum 6 hour accumulated rainfall')
+
+    for variable, (da, long_name) in daily.items():
+        if grid == '0.25x0.25':
+            # drop first 'day' for high res data since it accumulates data when
+            # there is no data (i.e. initialization time)
+            da = da.isel(time=slice(1,da.time.size))
+        elif ((variable == 'tp24') & (date > reference_time) & (grid == '0.5x0.5')): # new low-res forecast format. start = day 0 and 100 ensemble members!
+            # drop first 'day' since it accumulates data when
+            # there is no data (i.e. initialization time)
+            da = da.isel(time=slice(1,da.time.size))
+
+        # metadata    
+        da                        = da.rename(variable)
+        da.attrs['units']         = 'm'
+        da.attrs['long_name']     = long_name
+        da.attrs['forecastcycle'] = forecastcycle
+        daily[variable]           = da
+        
+    return daily
+
+
+def combine_cf_and_pf(da_cf,da_pf):
+    """
+    Combines the control (cf) and perturbed (pf) daily fields into one
+    preallocated float32 array with the cf appended as member 51 along
+    the number dimension of the pf (as xr.concat([pf,cf],dim='number')).
+    """
+    axis                = da_pf.get_axis_num('number')
+    shape               = list(da_pf.shape)
+    shape[axis]         = shape[axis] + 1
+    data                = np.empty(shape,dtype=np.float32)
+    index               = [slice(None)]*len(shape)
+    index[axis]         = slice(0,da_pf.number.size)
+    data[tuple(index)]  = da_pf.values
+    index[axis]         = da_pf.number.size
+    data[tuple(index)]  = da_cf.transpose(*[d for d in da_pf.dims if d != 'number']).values
+    coords              = {name: coord for name, coord in da_pf.coords.items() if 'number' not in coord.dims}
+    coords['number']    = np.append(da_pf.number.values,51)
+    return xr.DataArray(data,coords=coords,dims=da_pf.dims,attrs=da_pf.attrs,name=da_pf.name)
+
+
 # INPUT ----------------------------------------------- 
 variables           = ['tp24']                # tp24, rn24, mx24tp6, mx24rn6, mx24tpr
 product             = 'hindcast'              # hindcast or forecast ?
@@ -30,200 +100,59 @@ print(forecast_dates)
 reference_time = datetime(2023, 6, 27, 0, 0, 0)
 
 
-for variable in variables:
-    for date in forecast_dates:
-        for dtype in ['cf','pf']:
+# daily precipitation variables are calculated together from one read of tp6/sf6 
+precipitation_variables = [variable for variable in variables if variable in ['tp24','rn24','mx24tp6','mx24rn6']]
+
+for date in forecast_dates:
+
+    daily = {'cf':{},'pf':{}}
+    for dtype in ['cf','pf']:
 
-            misc.tic()
-            datestring = date.strftime('%Y-%m-%d')
-            print('variable: ' + variable + ', date: ' + datestring + ', dtype: ' + dtype)
+        misc.tic()
+        datestring = date.strftime('%Y-%m-%d')
+        print('variables: ' + ', '.join(variables) + ', date: ' + datestring + ', dtype: ' + dtype)
+        
+        forecastcycle = s2s.which_mv_for_init(datestring,model='ECMWF',fmt='%Y-%m-%d')
+        basename      = '%s_%s_%s_%s'%(forecastcycle,grid,datestring,dtype)
+
+        if precipitation_variables:
+            daily[dtype].update(calc_daily_precipitation_variables(product,basename,precipitation_variables,date,grid,forecastcycle))
+            
+        for variable in variables:
+            if variable == 'mx24tpr': # daily maximum timestep precipitation rate (kgm-2s-1)
+
+                path_in                       = config.dirs['s2s_' + product + '_6hourly'] + 'mxtpr/'
+                filename_in                   = 'mxtpr_' + basename + '.nc'
+                da                            = xr.open_dataset(path_in + filename_in)['mxtpr']
+                da                            = misc.resample_fixed_cadence(da,'1D','max').rename(variable)
+                da.attrs['units']             = 'kg m**-2 s**-1'
+                da.attrs['long_name']         = 'daily maximum timestep precipitation rate'
+                da.attrs['forecastcycle']     = forecastcycle
+                daily[dtype][variable]        = da
             
-            forecastcycle = s2s.which_mv_for_init(datestring,model='ECMWF',fmt='%Y-%m-%d')
-            basename      = '%s_%s_%s_%s'%(forecastcycle,grid,datestring,dtype)
-                
-            if variable == 'tp24': # daily accumulated precip (m)
-
-                path_in                          = config.dirs['s2s_' + product + '_6hourly'] + 'tp6/'
-                path_out                         = config.dirs['s2s_' + product + '_daily'] + variable + '/'
-                filename_in                      = 'tp6_' + basename + '.nc'
-                filename_out                     = variable + '_' + basename + '.nc'
-                ds                               = xr.open_dataset(path_in + filename_in)
-
-                # shift time back by 6 hours. This means that for data on day 0 with hours 0,6,12,18,24,
-                # hour 24 (accumulated from hour 18-24) is counted in day 0 not day 1. Basically,
-                # sum of hours 6,12,18,24 instead of 0,6,12,18 on a given day.
-                ds['time'] = ds.time - np.timedelta64(6,'h')
-                ds         = ds.resample(time='1D').sum('time')
-                if grid == '0.25x0.25':
-                    # drop first 'day' for high res data since it accumulates data when
-                    # there is no data (i.e. initialization time)
-                    ds = ds.isel(time=slice(1,ds.time.size))
-                elif ((date > reference_time) & (grid == '0.5x0.5')): # new low-res forecast format. start = day 0 and 100 ensemble members!
-                    # drop first 'day' since it accumulates data when
-                    # there is no data (i.e. initialization time)
-                    ds = ds.isel(time=slice(1,ds.time.size))
-                    
-                # metadata    
-                ds                                  = ds.rename({'tp6':variable})    
-                ds[variable].attrs['units']         = 'm'
-                ds[variable].attrs['long_name']     = 'daily accumulated precipitation'
-                ds[variable].attrs['forecastcycle'] = forecastcycle
-
-                if write2file: misc.to_netcdf_with_packing_and_compression(ds, path_out + filename_out)
-                    
-                ds.close()
-
-            elif variable == 'rn24': # daily accumulated rain (precip - snowfall, m)
-
-                path1_in                         = config.dirs['s2s_' + product + '_6hourly'] + 'tp6/'
-                path2_in                         = config.dirs['s2s_' + product + '_6hourly'] + 'sf6/'
-                path_out                         = config.dirs['s2s_' + product + '_daily'] + variable + '/'
-                filename1_in                     = 'tp6' + '_' + basename + '.nc'
-                filename2_in                     = 'sf6' + '_' + basename + '.nc'
-                filename_out                     = variable + '_' + basename + '.nc'
-                ds1                              = xr.open_dataset(path1_in + filename1_in)
-                ds2                              = xr.open_dataset(path2_in + filename2_in)
-
-                # shift time back by 6 hours so that accumulated quantities correspond
-                # to correct day
-                ds1['time'] = ds1.time - np.timedelta64(6,'h')
-                ds2['time'] = ds2.time - np.timedelta64(6,'h')
-                ds1         = ds1.resample(time='1D').sum('time')
-                ds2         = ds2.resample(time='1D').sum('time')
-                if grid == '0.25x0.25':
-                    ds1 = ds1.isel(time=slice(1,ds1.time.size))
-                    ds2 = ds2.isel(time=slice(1,ds2.time.size))
-                    
-                ds1['tp6']                           = ds1['tp6'] - ds2['sf6']
-                ds1                                  = ds1.rename({'tp6':variable})
-                ds1[variable].attrs['units']         = 'm'
-                ds1[variable].attrs['long_name']     = 'daily accumulated rainfall'
-                ds1[variable].attrs['forecastcycle'] = forecastcycle
-                
-                if write2file: misc.to_netcdf_with_packing_and_compression(ds1, path_out + filename_out)
-                    
-                ds1.close()
-                ds2.close()
-
-            elif variable == 'mx24tp6': # daily maximum 6 hour accumulated precip (m)
-
-                path_in                          = config.dirs['s2s_' + product + '_6hourly'] + 'tp6/'
-                path_out                         = config.dirs['s2s_' + product + '_daily'] + variable + '/'
-                filename_in                      = 'tp6' + '_' + basename + '.nc'
-                filename_out                     = variable + '_' + basename + '.nc'
-                ds                               = xr.open_dataset(path_in + filename_in)
-
-                # shift time back by 6 hours so that accumulated quantities correspond
-                # to correct day   
-                ds['time'] = ds.time - np.timedelta64(6,'h')
-                ds         = ds.resample(time='1D').max('time')
-                if grid == '0.25x0.25':
-                    ds = ds.isel(time=slice(1,ds.time.size))
-
-                ds                                  = ds.rename({'tp6':variable})
-                ds[variable].attrs['units']         = 'm'
-                ds[variable].attrs['long_name']     = 'daily maximum 6 hour accumulated precipitation'
-                ds[variable].attrs['forecastcycle'] = forecastcycle
-                
-                if write2file: misc.to_netcdf_with_packing_and_compression(ds, path_out + filename_out)
-                    
-                ds.close()
-
-            elif variable == 'mx24rn6': # daily maximum 6 hour accumulated rainfall (m)
-
-                path1_in                         = config.dirs['s2s_' + product + '_6hourly'] + 'tp6/'
-                path2_in                         = config.dirs['s2s_' + product + '_6hourly'] + 'sf6/'
-                path_out                         = config.dirs['s2s_' + product + '_daily'] + variable + '/'
-                
-                filename1_in                     = 'tp6_' + basename + '.nc'
-                filename2_in                     = 'sf6_' + basename + '.nc'
-                filename_out                     = variable + '_' + basename + '.nc'
-
-                ds1                              = xr.open_dataset(path1_in + filename1_in)
-                ds2                              = xr.open_dataset(path2_in + filename2_in)
-
-                # shift time back by 6 hours so that accumulated quantities correspond
-                # to correct day                                                                                                                                                
-                ds1['time'] = ds1.time - np.timedelta64(6,'h')
-                ds2['time'] = ds2.time - np.timedelta64(6,'h')
-                da          = (ds1['tp6'] - ds2['sf6']).resample(time='1D').max('time')
-                if grid == '0.25x0.25':
-                    da = da.isel(time=slice(1,da.time.size))
-                    
-                da.name                          = variable
-                da.attrs['units']                = 'm'
-                da.attrs['long_name']            = 'daily maximum 6 hour accumulated rainfall'
-                da.attrs['forecastcycle']        = forecastcycle
-                
-                if write2file: misc.to_netcdf_with_packing_and_compression(da, path_out + filename_out)
-                    
-                ds1.close()
-                ds2.close()
-                da.close()
-
-            elif variable == 'mx24tpr': # daily maximum timestep precipitation rate (kgm-2s-1)
-
-                path_in                             = config.dirs['s2s_' + product + '_6hourly'] + 'mxtpr/'
-                path_out                            = config.dirs['s2s_' + product + '_daily'] + variable + '/'
-                filename_in                         = 'mxtpr_' + basename + '.nc'
-                filename_out                        = variable + '_' + basename + '.nc'
-                ds                                  = xr.open_dataset(path_in + filename_in)
-                ds                                  = ds.resample(time='1D').max('time')                
-                ds                                  = ds.rename({'mxtpr':variable})
-                ds[variable].attrs['units']         = 'kg m**-2 s**-1'
-                ds[variable].attrs['long_name']     = 'daily maximum timestep precipitation rate'
-                ds[variable].attrs['forecastcycle'] = forecastcycle
-                if write2file: misc.to_netcdf_with_packing_and_compression(ds, path_out + filename_out)
-                    
-                ds.close()
-                
             elif variable == 't2m24': # daily-mean 2-meter temperature (K)
 
-                path_in                             = config.dirs['s2s_' + product + '_6hourly'] + 't2m/'
-                path_out                            = config.dirs['s2s_' + product + '_daily'] + variable + '/'
-                filename_in                         = 't2m_' + basename + '.nc'
-                filename_out                        = variable + '_' + basename + '.nc'
-                ds                                  = xr.open_dataset(path_in + filename_in)                
-                ds                                  = ds.resample(time='1D').mean('time')
-                ds                                  = ds.rename({'t2m':variable})
+                path_in                       = config.dirs['s2s_' + product + '_6hourly'] + 't2m/'
+                filename_in                   = 't2m_' + basename + '.nc'
+                da                            = xr.open_dataset(path_in + filename_in)['t2m']
+                da                            = misc.resample_fixed_cadence(da,'1D','mean').rename(variable)
 
                 # remove last day since it only does an average of the first 6 hours
                 # of the last day
-                ds = ds.isel(time=slice(0,ds.time.size-1))
-
-                ds[variable].attrs['units']         = 'K'
-                ds[variable].attrs['long_name']     = 'daily-mean 2-meter temperature'
-                ds[variable].attrs['forecastcycle'] = forecastcycle
-                
-                if write2file: misc.to_netcdf_with_packing_and_compression(ds, path_out + filename_out)
-                    
-                ds.close()
+                da = da.isel(time=slice(0,da.time.size-1))
 
-                
+                da.attrs['units']             = 'K'
+                da.attrs['long_name']         = 'daily-mean 2-meter temperature'
+                da.attrs['forecastcycle']     = forecastcycle
+                daily[dtype][variable]        = da
 
-        if write2file:
-            
-            print('combine cf and pf files into one file..')
-            basename_cf     = '%s_%s_%s_%s'%(forecastcycle,grid,datestring,'cf')
-            basename_pf     = '%s_%s_%s_%s'%(forecastcycle,grid,datestring,'pf')
-            basename        = '%s_%s'%(grid,datestring) 
-            filename_out_cf = variable + '_' + basename_cf + '.nc'
-            filename_out_pf = variable + '_' + basename_pf + '.nc'
-            filename_out    = variable + '_' + basename + '.nc'
-            ds_cf           = xr.open_dataset(path_out + filename_out_cf)
-            ds_pf           = xr.open_dataset(path_out + filename_out_pf)
-            ds_cf           = ds_cf.assign_coords(number=51).expand_dims(dim={"number": 1},axis=1)
-            ds              = xr.concat([ds_pf,ds_cf], dim="number")
-            misc.to_netcdf_with_packing_and_compression(ds, path_out + filename_out)
-            ds_pf.close()
-            ds_cf.close()
-            ds.close()
-            os.system('rm ' + path_out + filename_out_cf)
-            os.system('rm ' + path_out + filename_out_pf)
-
-
-            
         misc.toc()
 
-
-
+    # combine cf and pf into one array and write once
+    if write2file:
+        for variable in variables:
+            
+            path_out     = config.dirs['s2s_' + product + '_daily'] + variable + '/'
+            filename_out = variable + '_' + grid + '_' + datestring + '.nc'
+            da           = combine_cf_and_pf(daily['cf'][variable],daily['pf'][variable])
+            misc.to_netcdf_with_packing_and_compression(da, path_out + filename_out)
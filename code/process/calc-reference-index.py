@@ -0,0 +1,31 @@
+"""
+Builds (or updates) kerchunk reference indexes over the per-date netcdf
+files of the anomaly, probability and binary products, see
+Dunnsigouin_etal_2025/store.py. Each index opens as one lazy dataset over
+all forecast dates without rewriting the files. Rerun when new dates land,
+only the new or modified files are scanned.
+"""
+
+from Dunnsigouin_etal_2025 import misc,store
+
+# INPUT -----------------------------------------------
+score_flag = 'fbss'                     # fmsess (anomaly) or fbss (probability and binary)
+time_flag  = 'weekly'                   # daily or weekly
+variable   = 't2m24'                    # tp24,rn24,mx24rn6,mx24tp6,mx24tpr
+domain     = 'europe'                   # europe or norway
+grid       = 'day1to46_0.5x0.5'         # 0.25x0.25 or day1to46_0.5x0.5
+pval       = 0.1                        # only used for fbss
+# -----------------------------------------------------
+
+if score_flag == 'fmsess':
+    products = [('s2s_forecast_' + time_flag + '_anomaly', None), ('era5_forecast_' + time_flag + '_anomaly', None)]
+elif score_flag == 'fbss':
+    products = [('s2s_forecast_' + time_flag + '_probability', pval), ('era5_forecast_' + time_flag + '_binary', pval)]
+
+for product, product_pval in products:
+
+    misc.tic()
+    print('\nproduct: ' + product + ', variable: ' + variable + ', grid: ' + grid)
+    filename_index = store.build_reference_index(product, domain, variable, grid, product_pval)
+    print('written: ' + filename_index)
+    misc.toc()
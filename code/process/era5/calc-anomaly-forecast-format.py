@@ -6,7 +6,7 @@ to smoothed climatological mean from hindcast format data.
 import numpy    as np
 import xarray   as xr
 import pandas   as pd
-from Dunnsigouin_etal_2025 import misc,s2s,config,verify
+from Dunnsigouin_etal_2025 import misc,s2s,config,verify,store
 
 # INPUT -----------------------------------------------
 time_flag           = 'weekly'                 # daily or weekly
@@ -18,6 +18,7 @@ grid                = 'day1to46_0.5x0.5'       # '0.25x0.25' & '0.5x0.5'
 domain              = 'europe'
 box_sizes           = np.arange(1,61,2)        # smoothing box size in grid points per side. Must be odd!  
 write2file          = True
+write2zarr          = False                    # also append to the consolidated zarr store of the product
 # -----------------------------------------------------
 
 # get forecast dates 
@@ -61,28 +62,11 @@ for date in forecast_dates:
     anomaly_smooth = verify.boxcar_smoother_xy_optimized(box_sizes, anomaly, 'xarray')
     
     # modify metadata
-    anomaly_smooth = anomaly_smooth.rename(variable)
-    if variable == 'tp24':
-        anomaly_smooth.attrs['units']     = 'm'
-        anomaly_smooth.attrs['long_name'] = 'anomalies of daily accumulated precipitation'
-    elif variable == 't2m24':
-        anomaly_smooth.attrs['units']     = 'K'
-        anomaly_smooth.attrs['long_name'] = 'anomalies of daily-mean 2-meter temperature'
-    elif variable == 'rn24':
-        anomaly_smooth.attrs['units']     = 'm'
-        anomaly_smooth.attrs['long_name'] = 'anomalies of daily accumulated rainfall'
-    elif variable == 'mx24tpr':
-        anomaly_smooth.attrs['units']     = 'kg m**-2 s**-1'
-        anomaly_smooth.attrs['long_name'] = 'anomalies of daily maximum timestep precipitation rate'
-    elif variable == 'mx24tp6':
-        anomaly_smooth.attrs['units']     = 'm'
-        anomaly_smooth.attrs['long_name'] = 'anomalies of daily maximum 6 hour accumulated precipitation'
-    elif variable == 'mx24rn6':
-        anomaly_smooth.attrs['units']     = 'm'
-        anomaly_smooth.attrs['long_name'] = 'anomalies of daily maximum 6 hour accumulated rainfall'
+    anomaly_smooth = verify.set_product_attrs(anomaly_smooth.rename(variable), 'anomaly', variable)
 
     # write output
-    if write2file: misc.to_netcdf_with_packing_and_compression(anomaly_smooth, path_out + filename_out)
+    if write2file: misc.to_netcdf_with_packing_and_compression(anomaly_smooth, path_out + filename_out, chunksizes=config.chunks['anomaly'])
+    if write2zarr: store.append_to_store(anomaly_smooth, store.get_store_filename('era5_forecast_' + time_flag + '_anomaly', domain, variable, grid), date)
 
     forecast.close()
     hindcast.close()
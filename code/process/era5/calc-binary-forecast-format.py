@@ -7,7 +7,7 @@ format data
 import xarray   as xr
 import numpy    as np
 import pandas   as pd
-from Dunnsigouin_etal_2025 import config,misc,s2s, verify
+from Dunnsigouin_etal_2025 import config,misc,s2s, verify,store
 
 
 def initialize_quantile_array(variable,box_sizes,time_flag,dim):
@@ -43,10 +43,12 @@ first_forecast_date = '20200102'               # first initialization date of fo
 number_forecasts    = 209                        # number of forecast initializations
 season              = 'annual'
 grid                = 'day1to46_0.5x0.5'              # '0.25x0.25' or '0.5x0.5'
-pval                = 0.1                      # percentile values
+pvals               = [0.1]                    # percentile values. Several thresholds are done in one pass
 domain              = 'europe'
 box_sizes           = np.arange(1,61,2)        # smoothing box size in grid points per side. Must be odd!
+workers             = 16                       # number of threads used for spatial smoothing
 write2file          = True
+write2zarr          = False                    # also append to the consolidated zarr store of the product
 # ----------------------------------------------------
 
 forecast_dates = s2s.get_forecast_dates(first_forecast_date,number_forecasts,season).strftime('%Y-%m-%d').values
@@ -61,7 +63,7 @@ for date in forecast_dates:
     # define stuff                                                                                                                                                         
     path_in_forecast     = config.dirs['era5_forecast_daily'] + variable + '/'
     path_in_hindcast     = config.dirs['era5_hindcast_daily'] + variable + '/'
-    path_out             = config.dirs['era5_forecast_' + time_flag + '_binary'] + str(pval) + '/' + domain + '/' + variable + '/'
+    paths_out            = [config.dirs['era5_forecast_' + time_flag + '_binary'] + str(pval) + '/' + domain + '/' + variable + '/' for pval in pvals]
     filename_in_forecast = variable + '_' + grid + '_' + date + '.nc'
     filename_in_hindcast = variable + '_' + grid + '_' + date + '.nc'
     filename_out         = variable + '_' + grid + '_' + date + '.nc'
@@ -75,37 +77,33 @@ for date in forecast_dates:
     forecast = verify.resample_daily_to_weekly(forecast, time_flag, grid, variable)
     hindcast = verify.resample_daily_to_weekly(hindcast, time_flag, grid, variable)
     
-    # spatial smoothing 
-    forecast_smooth = verify.boxcar_smoother_xy_optimized(box_sizes, forecast, 'xarray')
-    hindcast_smooth = verify.boxcar_smoother_xy_optimized(box_sizes, hindcast, 'numpy')
-
-    # calculate quantiles - use numpy arrays for speed
-    quantile            = initialize_quantile_array(variable,box_sizes,time_flag,dim)
-    quantile[:,:,:,:]   = np.quantile(hindcast_smooth,pval,axis=1)
-    quantile['time']    = forecast['time'] # match time dimensions    
-
-    # convert to binary
-    if pval > 0.5: binary = forecast_smooth.where(forecast_smooth < quantile, 1.0).where(forecast_smooth >= quantile, 0.0)   
-    elif pval <= 0.5: binary = forecast_smooth.where(forecast_smooth > quantile, 1.0).where(forecast_smooth <= quantile, 0.0)
+    # smooth forecast and hindcast one box size at a time to reduce memory,
+    # calculate hindcast quantiles for all pvals in one partition of the
+    # hindcast and convert forecast to binary for each pval
+    quantile         = initialize_quantile_array(variable,box_sizes,time_flag,dim).expand_dims(pval=pvals).copy()
+    quantile['time'] = forecast['time'] # match time dimensions
+    binary           = xr.DataArray(np.zeros(quantile.shape,dtype=np.uint8),coords=quantile.coords,dims=quantile.dims)
+    forecast_smooth  = verify.iter_boxcar_smooth(forecast, box_sizes, 'xarray', dtype='float32', workers=workers)
+    hindcast_smooth  = verify.iter_boxcar_smooth(hindcast, box_sizes, 'xarray', dtype='float32', workers=workers)
+    for bs, ((box_size, forecast_temp), (_, hindcast_temp)) in enumerate(zip(forecast_smooth, hindcast_smooth)):
+        quantile[:,bs,:,:,:] = verify.calc_hindcast_quantile(hindcast_temp, pvals, forecast['time']).values
+        for i, pval in enumerate(pvals):
+            binary[i,bs,:,:,:] = verify.calc_binary(forecast_temp, quantile[i,bs], pval).values
     
     # fix metadata
-    binary = binary.rename(variable)
-    if variable == 'tp24':
-        binary.attrs['units']     = 'unitless'
-        binary.attrs['long_name'] = 'binary daily accumulated precipitation over quantile pval'
-    elif variable == 't2m24':
-        binary.attrs['units']     = 'unitless'
-        binary.attrs['long_name'] = 'binary daily-mean temperature over quantile pval'
-    elif variable == 'rn24':
-        binary.attrs['units']     = 'unitless'
-        binary.attrs['long_name'] = 'binary daily accumulated rain over quantile pval'
-
-    if write2file: misc.to_netcdf_with_packing_and_compression(binary, path_out + filename_out)
+    binary = verify.set_product_attrs(verify.set_binary_flag_attrs(binary.rename(variable)), 'binary', variable)
+
+    # write each pval to its own directory as before
+    if write2file: 
+        for i, path_out in enumerate(paths_out):
+            misc.to_netcdf_with_compression(binary[i].drop_vars('pval'), 5, path_out, filename_out, chunksizes=config.chunks['binary']) # uint8 flags, no packing
+    if write2zarr:
+        for i, pval in enumerate(pvals):
+            store.append_to_store(binary[i].drop_vars('pval'), store.get_store_filename('era5_forecast_' + time_flag + '_binary', domain, variable, grid, pval), date)
     
     forecast.close()
     hindcast.close()
     quantile.close()
-    forecast_smooth.close()
     binary.close()
 
     misc.toc()
@@ -29,11 +29,11 @@ for variable in variables:
             filename_in                     = 'tp6_' + grid + '_' + str(year) + '.nc'
             filename_out                    = variable + '_' + grid + '_' + str(year) + '.nc'
             ds                              = xr.open_dataset(dir_in + filename_in)
-            ds                              = ds.resample(time='1D').sum('time')
+            ds                              = misc.resample_fixed_cadence(ds,'1D','sum')
             ds                              = ds.rename({'tp6':variable})
             ds[variable].attrs['units']     = 'm'
             ds[variable].attrs['long_name'] = 'daily accumulated precipitation'
-            if write2file: ds.to_netcdf(dir_out + filename_out)
+            if write2file: misc.to_netcdf_with_compression(ds,comp_lev,dir_out,filename_out)
             ds.close()
             
         elif variable == 'rn24': # daily accumulated rain (precip - snowfall, m)
@@ -45,15 +45,15 @@ for variable in variables:
             filename2_in = 'sf6_' + grid + '_' + str(year) + '.nc'
             ds1          = xr.open_dataset(dir_in1 + filename1_in)
             ds2          = xr.open_dataset(dir_in2 + filename2_in)
-            ds1          = ds1.resample(time='1D').sum('time')
-            ds2          = ds2.resample(time='1D').sum('time')
+            ds1          = misc.resample_fixed_cadence(ds1,'1D','sum')
+            ds2          = misc.resample_fixed_cadence(ds2,'1D','sum')
             ds1['tp6']   = ds1['tp6'] - ds2['sf6']
             if write2file:
                 filename_out                     = variable + '_' + grid + '_' + str(year) + '.nc'
                 ds1                              = ds1.rename({'tp6':variable})
                 ds1[variable].attrs['units']     = 'm'
                 ds1[variable].attrs['long_name'] = 'daily accumulated rainfall'
-                ds1.to_netcdf(dir_out + filename_out)
+                misc.to_netcdf_with_compression(ds1,comp_lev,dir_out,filename_out)
             ds1.close()
             ds2.close()
             
@@ -65,10 +65,10 @@ for variable in variables:
             filename_out                    = variable + '_' + grid + '_' + str(year) + '.nc'
             ds                              = xr.open_dataset(dir_in + filename_in)
             ds                              = ds.rename({'tp6':variable})
-            ds                              = ds.resample(time='1D').max('time')
+            ds                              = misc.resample_fixed_cadence(ds,'1D','max')
             ds[variable].attrs['units']     = 'm'
             ds[variable].attrs['long_name'] = 'daily maximum 6 hour accumulated precipitation'
-            if write2file: ds.to_netcdf(dir_out + filename_out)
+            if write2file: misc.to_netcdf_with_compression(ds,comp_lev,dir_out,filename_out)
             ds.close()
             
         elif variable == 'mx24rn6': # daily maximum 6 hour accumulated rain (precip - snowfall, m)
@@ -80,13 +80,13 @@ for variable in variables:
             filename2_in = 'sf6_' + grid + '_' + str(year) + '.nc'
             ds1          = xr.open_dataset(dir_in1 + filename1_in)
             ds2          = xr.open_dataset(dir_in2 + filename2_in)
-            da           = (ds1['tp6'] - ds2['sf6']).resample(time='1D').max('time')
+            da           = misc.resample_fixed_cadence(ds1['tp6'] - ds2['sf6'],'1D','max')
             if write2file:
                 filename_out             = variable + '_' + grid + '_' + str(year) + '.nc'
                 da.name                  = variable
                 da.attrs['units']        = 'm'
                 da.attrs['long_name']    = 'daily maximum 6 hour accumulated rainfall'
-                da.to_netcdf(dir_out + filename_out)
+                misc.to_netcdf_with_compression(da,comp_lev,dir_out,filename_out)
             ds1.close()
             ds2.close()
             da.close()
@@ -98,11 +98,11 @@ for variable in variables:
             filename_in                     = 'mx6tpr_' + grid + '_' + str(year) + '.nc'
             filename_out                    = variable + '_' + grid + '_' + str(year) + '.nc'
             ds                              = xr.open_dataset(dir_in + filename_in)
-            ds                              = ds.resample(time='1D').max('time')
+            ds                              = misc.resample_fixed_cadence(ds,'1D','max')
             ds                              = ds.rename({'mx6tpr':variable})
             ds[variable].attrs['units']     = 'kg m**-2 s**-1'
             ds[variable].attrs['long_name'] = 'daily maximum timestep precipitation rate'
-            if write2file: ds.to_netcdf(dir_out + filename_out)
+            if write2file: misc.to_netcdf_with_compression(ds,comp_lev,dir_out,filename_out)
             ds.close()
         elif variable == 't2m24': # daily-mean 2-meter temperature
             dir_in                          = config.dirs['era5_6hourly'] + 't2m6/'
@@ -111,14 +111,11 @@ for variable in variables:
             filename_out                    = variable + '_' + grid + '_' + str(year) + '.nc'
             ds                              = xr.open_dataset(dir_in + filename_in)
             ds                              = ds.rename({'t2m6':variable})
-            ds                              = ds.resample(time='1D').mean('time')
+            ds                              = misc.resample_fixed_cadence(ds,'1D','mean')
             ds[variable].attrs['units']     = 'K'
             ds[variable].attrs['long_name'] = 'daily-mean 2-meter temperature'
-            if write2file: ds.to_netcdf(dir_out + filename_out)
+            if write2file: misc.to_netcdf_with_compression(ds,comp_lev,dir_out,filename_out)
             ds.close()
-            
-
-        if write2file: misc.compress_file(comp_lev,3,filename_out,dir_out)
 
         
         misc.toc()
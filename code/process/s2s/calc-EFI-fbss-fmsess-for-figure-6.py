@@ -37,66 +37,6 @@ def find_most_recent_hindcast(forecast_file, hindcast_dir):
     return os.path.join(hindcast_dir, most_recent_hindcast) if most_recent_hindcast else None
 
 
-def init_EFI(forecast):
-
-    box_size  = forecast['box_size']
-    time      = forecast['time']
-    latitude  = forecast['latitude']
-    longitude = forecast['longitude']
-
-    data       = np.zeros((box_sizes.size,time.size,dim.nlatitude,dim.nlongitude),dtype=np.float32)
-    dims       = ["box_size","time","latitude","longitude"]
-    coords     = dict(box_size=box_sizes,time=time,latitude=latitude,longitude=longitude)
-
-    units       = 'none: 0-1'
-    description = 'ecmwf extreme forecast index'
-
-    attrs      = dict(description=description,units=units)
-    name       = 'EFI'
-    
-    return xr.DataArray(data=data,dims=dims,coords=coords,attrs=attrs,name=name)
-
-
-def calculate_EFI(forecast,hindcast,dq):
-
-    # re-order forecast and hindcast dimensions for convenience
-    hindcast = hindcast.transpose('box_size','hdate','number','time','latitude','longitude')
-    forecast = forecast.transpose('box_size','number','time','latitude','longitude')
-
-    # define stuff
-    box_size = forecast['box_size'].size
-    number   = forecast['number'].size
-    EFI      = init_EFI(forecast)
-
-    # calculate EFI for each smoothing box_size
-    for bs in range(box_size):
-
-        print(bs)
-        
-        # work with number arrays for speed
-        hindcast_temp = hindcast[bs,:].values
-        forecast_temp = forecast[bs,:].values
-        
-        # Reshape the hindcast array to combine the 'hdate' and 'number' dimensions
-        dim_sizes      = hindcast_temp.shape
-        hindcast_temp  = hindcast_temp.reshape(dim_sizes[0] * dim_sizes[1], *dim_sizes[2:])
-
-        # Calculate quantiles for the hindcast along the combined dimension
-        q   = np.arange(dq,1.0,dq)
-        qx  = np.quantile(hindcast_temp,q,axis=0)
-
-        # Calculate the fraction of forecast members below each hindcast quantile
-        fq = np.zeros((qx.shape))
-        for i in range(q.size):
-            fq[i,:] = (forecast_temp < qx[i,:]).sum(axis=0)/number
-
-        # Vectorized calculation of EFI
-        EFI[bs,:] = (2 / np.pi) * np.sum((q[:, np.newaxis, np.newaxis, np.newaxis] - fq) / \
-                        np.sqrt(q[:, np.newaxis, np.newaxis, np.newaxis] * (1 - q[:, np.newaxis, np.newaxis, np.newaxis]))*dq, axis=0)
-    
-    return EFI
-
-
 def initialize_score_array(time,box_sizes,name):
     """
     Initializes score array.
@@ -121,6 +61,7 @@ grid                = '0.25x0.25'          # '0.25x0.25' & '0.5x0.5'
 domain              = 'scandinavia'
 box_sizes           = np.arange(1,61,2)        # smoothing box size in grid points per side. Must be odd!  
 write2file          = False
+workers             = 8                         # threads over box sizes in EFI calculation
 # -----------------------------------------------------
 
 # get forecast dates
@@ -153,7 +94,7 @@ for date in forecast_dates:
     hindcast1 = verify.boxcar_smoother_xy_optimized(box_sizes, hindcast1, 'xarray')
 
     # calculate extreme forecast index
-    EFI = calculate_EFI(forecast1,hindcast1,dq=0.01)
+    EFI = verify.extreme_forecast_index(forecast1,hindcast1,dq=0.01,workers=workers)
 
     # 2) Calculate FMSESS 
     path_in_forecast2        = config.dirs['s2s_forecast_' + time_flag + '_anomaly'] + '/' + domain + '/' + variable + '/'
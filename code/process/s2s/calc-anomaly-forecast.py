@@ -6,7 +6,7 @@ to smoothed climatological mean from hindcast data.
 import numpy    as np
 import xarray   as xr
 import pandas   as pd
-from Dunnsigouin_etal_2025 import misc,s2s,config,verify
+from Dunnsigouin_etal_2025 import misc,s2s,config,verify,store
 
 # INPUT -----------------------------------------------
 time_flag           = 'weekly'                 # daily or weekly
@@ -17,7 +17,9 @@ season              = 'annual'
 grid                = 'day1to46_0.5x0.5'          # '0.25x0.25' & '0.5x0.5'
 domain              = 'europe'
 box_sizes           = np.arange(1,61,2)        # smoothing box size in grid points per side. Must be odd!  
+smoother            = 'uniform_filter'         # 'uniform_filter' or 'summed_area_table' (faster for many box sizes, holds a float64 table twice the size of the float32 input)
 write2file          = True
+write2zarr          = False                    # also append to the consolidated zarr store of the product
 # -----------------------------------------------------
 
 # get forecast dates 
@@ -55,31 +57,14 @@ for date in forecast_dates:
     anomaly = forecast - hindcast
 
     # apply spatial smoothing
-    anomaly_smooth = verify.boxcar_smoother_xy_optimized(box_sizes, anomaly, 'xarray')
+    anomaly_smooth = verify.boxcar_smoother_xy_optimized(box_sizes, anomaly, 'xarray', method=smoother)
     
     # modify metadata
-    anomaly_smooth = anomaly_smooth.rename(variable)
-    if variable == 'tp24':
-        anomaly_smooth.attrs['units']     = 'm'
-        anomaly_smooth.attrs['long_name'] = 'anomalies of daily accumulated precipitation'
-    elif variable == 't2m24':
-        anomaly_smooth.attrs['units']     = 'K'
-        anomaly_smooth.attrs['long_name'] = 'anomalies of daily-mean 2-meter temperature'
-    elif variable == 'rn24':
-        anomaly_smooth.attrs['units']     = 'm'
-        anomaly_smooth.attrs['long_name'] = 'anomalies of daily accumulated rainfall'
-    elif variable == 'mx24tpr':
-        anomaly_smooth.attrs['units']     = 'kg m**-2 s**-1'
-        anomaly_smooth.attrs['long_name'] = 'anomalies of daily maximum timestep precipitation rate'
-    elif variable == 'mx24tp6':
-        anomaly_smooth.attrs['units']     = 'm'
-        anomaly_smooth.attrs['long_name'] = 'anomalies of daily maximum 6 hour accumulated precipitation'
-    elif variable == 'mx24rn6':
-        anomaly_smooth.attrs['units']     = 'm'
-        anomaly_smooth.attrs['long_name'] = 'anomalies of daily maximum 6 hour accumulated rainfall'
+    anomaly_smooth = verify.set_product_attrs(anomaly_smooth.rename(variable), 'anomaly', variable)
 
     # write output
-    if write2file: misc.to_netcdf_with_packing_and_compression(anomaly_smooth, path_out + filename_out)
+    if write2file: misc.to_netcdf_with_packing_and_compression(anomaly_smooth, path_out + filename_out, chunksizes=config.chunks['anomaly'])
+    if write2zarr: store.append_to_store(anomaly_smooth, store.get_store_filename('s2s_forecast_' + time_flag + '_anomaly', domain, variable, grid), date)
 
     forecast.close()
     hindcast.close()
@@ -6,7 +6,7 @@ than a quantile threshold calculated from its corresponding hindcast data.
 import numpy           as np
 import xarray          as xr
 from dask.diagnostics  import ProgressBar
-from Dunnsigouin_etal_2025        import misc,s2s,config,verify
+from Dunnsigouin_etal_2025        import misc,s2s,config,verify,store
 import os
 
 
@@ -43,9 +43,12 @@ number_forecasts    = 209                        # number of forecast initializa
 season              = 'annual'
 grid                = 'day1to46_0.5x0.5'              # '0.25x0.25' or '0.5x0.5'
 box_sizes           = np.arange(1,61,2)        # smoothing box size in grid points per side. Must be odd!
-pval                = 0.1                     # percentile value  
+smoother            = 'uniform_filter'         # 'uniform_filter' or 'summed_area_table' (faster for many box sizes, holds a float64 table twice the size of the float32 input)
+workers             = 16                       # number of threads used for spatial smoothing
+pvals               = [0.1]                    # percentile values. Several thresholds are done in one pass
 domain              = 'europe'
 write2file          = True
+write2zarr          = False                    # also append to the consolidated zarr store of the product
 # ----------------------------------------------------
 
 # get all dates for monday and thursday forecast initializations
@@ -61,7 +64,7 @@ for date in forecast_dates:
     # define stuff
     path_in_forecast     = config.dirs['s2s_forecast_daily'] + variable + '/'
     path_in_hindcast     = config.dirs['s2s_hindcast_daily'] + variable + '/'
-    path_out             = config.dirs['s2s_forecast_' + time_flag + '_probability'] + str(pval) + '/' + domain + '/' + variable + '/'
+    paths_out            = [config.dirs['s2s_forecast_' + time_flag + '_probability'] + str(pval) + '/' + domain + '/' + variable + '/' for pval in pvals]
     filename_in_forecast = variable + '_' + grid + '_' + date + '.nc'
     filename_in_hindcast = variable + '_' + grid + '_' + date + '.nc'
     filename_out         = variable + '_' + grid + '_' + date + '.nc'
@@ -75,39 +78,35 @@ for date in forecast_dates:
     forecast = verify.resample_daily_to_weekly(forecast, time_flag, grid, variable)
     hindcast = verify.resample_daily_to_weekly(hindcast, time_flag, grid, variable)
 
-    # spatial smoothing of forecast
-    forecast_smooth = verify.boxcar_smoother_xy_optimized(box_sizes, forecast, 'xarray')
-
-    # calculate quantiles.
-    # loop through each hindcast smoothing size to reduce memory.
-    quantile = initialize_quantile_array(variable,box_sizes,time_flag,dim)
-    for bs, box_size in enumerate(box_sizes):
+    # smooth forecast and hindcast one box size at a time to reduce memory,
+    # calculate hindcast quantiles for all pvals in one partition of the 
+    # hindcast and convert forecast to probability for each pval, stored
+    # exactly as the number of ensemble members > or < quantile
+    quantile         = initialize_quantile_array(variable,box_sizes,time_flag,dim).expand_dims(pval=pvals).copy()
+    quantile['time'] = forecast['time'] # match time dimensions
+    count_dtype      = np.uint8 if forecast['number'].size <= np.iinfo(np.uint8).max else np.uint16
+    probability      = xr.DataArray(np.zeros(quantile.shape,dtype=count_dtype),coords=quantile.coords,dims=quantile.dims)
+    forecast_smooth  = verify.iter_boxcar_smooth(forecast, box_sizes, 'xarray', method=smoother, dtype='float32', workers=workers)
+    hindcast_smooth  = verify.iter_boxcar_smooth(hindcast, box_sizes, 'xarray', method=smoother, dtype='float32', workers=workers)
+    for bs, ((box_size, forecast_temp), (_, hindcast_temp)) in enumerate(zip(forecast_smooth, hindcast_smooth)):
         print('box size = ' + str(box_size))
-        hindcast_smooth      = verify.boxcar_smoother_xy_optimized(np.array([box_size]), hindcast, 'numpy').squeeze()
-        dim_sizes            = hindcast_smooth.shape
-        hindcast_smooth      = np.reshape(hindcast_smooth,[dim_sizes[0],dim_sizes[1]*dim_sizes[2],dim_sizes[3],dim_sizes[4]]) # concatenate hdate and number dims for sample
-        quantile[bs,:,:,:]   = np.quantile(hindcast_smooth,pval,axis=1)
-        quantile['time']     = forecast['time'] # match time dimensions
-        
-    # convert to probability (number of ensemble members > or < quantile)
-    if pval > 0.5: probability = (forecast_smooth >= quantile).mean(dim='number')
-    elif pval <= 0.5: probability = (forecast_smooth < quantile).mean(dim='number')
+        quantile[:,bs,:,:,:] = verify.calc_hindcast_quantile(hindcast_temp, pvals, forecast['time']).values
+        for i, pval in enumerate(pvals):
+            probability[i,bs,:,:,:] = verify.calc_exceedance_count(forecast_temp, quantile[i,bs], pval).values
 
-    # fix metadata
-    probability = probability.rename(variable)
-    if variable == 'tp24':
-        probability.attrs['units']     = 'unitless'
-        probability.attrs['long_name'] = 'probability of daily accumulated precipitation over quantile pval'
-    elif variable == 't2m24':
-        probability.attrs['units']     = 'unitless'
-        probability.attrs['long_name'] = 'probability of daily-mean temperature over quantile pval'
-    elif variable == 'rn24':
-        probability.attrs['units']     = 'unitless'
-        probability.attrs['long_name'] = 'probability of daily accumulated rain over quantile pval'
+    # fix metadata. Divide by number to get probability
+    probability                 = probability.rename(variable)
+    probability.attrs['number'] = forecast['number'].size
+    probability                 = verify.set_product_attrs(probability, 'probability', variable)
 
-    if write2file: misc.to_netcdf_with_packing_and_compression(probability, path_out + filename_out)
+    # write each pval to its own directory as before
+    if write2file: 
+        for i, path_out in enumerate(paths_out):
+            misc.to_netcdf_with_compression(probability[i].drop_vars('pval'), 5, path_out, filename_out, chunksizes=config.chunks['probability']) # exact counts, no packing
+    if write2zarr:
+        for i, pval in enumerate(pvals):
+            store.append_to_store(probability[i].drop_vars('pval'), store.get_store_filename('s2s_forecast_' + time_flag + '_probability', domain, variable, grid, pval), date)
 
-    forecast_smooth.close()
     hindcast.close()
     forecast.close()
     probability.close()
@@ -19,7 +19,7 @@ downstream.
 import numpy     as np
 import xarray    as xr
 import os
-from Dunnsigouin_etal_2025  import misc,s2s,verify,config
+from Dunnsigouin_etal_2025  import misc,s2s,verify,config,store
 
 # INPUT -----------------------------------------------
 score_flag               = 'fbss'
@@ -32,8 +32,14 @@ season                   = 'annual'                 # pick forecasts in specific
 grid                     = 'day1to46_0.5x0.5'       # 0.25x0.25 or day1to46_0.5x0.5
 box_sizes                = np.arange(1,61,2)        # smoothing box size in grid points per side. Must be odd!
 number_bootstrap         = 10000                    # number of times to shuffle initialization dates for error bars
+store_bootstrap          = False                    # write all bootstrapped scores to file (large)
 pval                     = 0.1
 dt                       = 0.05                     # interpolation for lead time gained & max skill calculation
+in_memory                = False                    # calculate errors from daily values without reading smoothed anomaly/probability files
+write_intermediate       = False                    # in_memory only: also write smoothed anomaly/probability/binary files
+use_zarr_store           = False                    # read all forecast dates at once from the consolidated zarr stores (see store.py)
+use_reference_index      = False                    # same from reference indexes over the netcdf files (see calc-reference-index.py)
+prefetch                 = 2                        # number of forecast dates read ahead on background threads (0 = no prefetching)
 write2file               = True
 # -----------------------------------------------------
 
@@ -48,37 +54,51 @@ path_out = config.dirs['verify']
 if score_flag == 'fmsess':
     path_in_forecast        = config.dirs['s2s_forecast_' + time_flag + '_anomaly'] + '/' + domain + '/' + variable + '/'
     path_in_verification    = config.dirs['era5_forecast_' + time_flag + '_anomaly'] + '/' + domain + '/' + variable + '/'
+    products                = [('s2s_forecast_' + time_flag + '_anomaly', None), ('era5_forecast_' + time_flag + '_anomaly', None)]
     prefix                  = score_flag + '_' + variable + '_' + time_flag + '_' + domain + '_' + season + '_' + forecast_dates[0] + '_' + forecast_dates[-1]
 elif score_flag == 'fbss':
     path_in_forecast        = config.dirs['s2s_forecast_' + time_flag + '_probability'] + str(pval) + '/' + domain + '/' + variable + '/'
     path_in_verification    = config.dirs['era5_forecast_' + time_flag + '_binary'] + str(pval) + '/' + domain + '/' + variable + '/'
+    products                = [('s2s_forecast_' + time_flag + '_probability', pval), ('era5_forecast_' + time_flag + '_binary', pval)]
     prefix                  = score_flag + '_' + variable + '_pval' + str(pval) + '_' + time_flag + '_' + domain + '_' + season + '_' + forecast_dates[0] + '_' + forecast_dates[-1]
     
 # define misc stuff 
 filename_out        = prefix + '_' + grid + '.nc'
 dim                 = verify.get_data_dimensions(grid, time_flag, domain)
+if use_reference_index: [store_forecast, store_verification] = [store.get_reference_index_filename(product, domain, variable, grid, product_pval)[0] for product, product_pval in products]
+else: [store_forecast, store_verification] = [store.get_store_filename(product, domain, variable, grid, product_pval) for product, product_pval in products]
 
 
 
 print('\ncalculating ' + score_flag + ' for variable ' + variable + ' on grid ' + grid)
 
 # initialize output arrays
-[score,score_bootstrap,sig] = verify.initialize_misc_arrays(score_flag,dim,box_sizes,number_bootstrap)
+[score,score_bootstrap,sig] = verify.initialize_misc_arrays(score_flag,dim,box_sizes,number_bootstrap if store_bootstrap else 0)
 forecast_error              = verify.initialize_error_array(dim,box_sizes,forecast_dates)
 reference_error             = verify.initialize_error_array(dim,box_sizes,forecast_dates)
     
-# loop over forecast dates
-for  i, date in enumerate(forecast_dates):
-    print('forecast date: ' + date)
-    filename_verification                           = path_in_verification + variable + '_' + grid + '_' + date + '.nc'
-    filename_forecast                               = path_in_forecast + variable + '_' + grid + '_' + date + '.nc'
-    forecast_error[i, ...], reference_error[i, ...] = verify.calc_forecast_and_reference_error(score_flag,filename_verification, filename_forecast, variable, box_sizes, grid, pval)
+# open the zarr stores or reference indexes once and reduce over all 
+# forecast dates with dask, otherwise loop over forecast dates
+if use_zarr_store or use_reference_index:
+    forecast_error[...], reference_error[...] = verify.calc_forecast_and_reference_error_from_store(score_flag, store_verification, store_forecast, variable, box_sizes, grid, forecast_dates, pval)
+elif in_memory:
+    for  i, date in enumerate(forecast_dates):
+        print('forecast date: ' + date)
+        forecast_error[i, ...], reference_error[i, ...] = verify.calc_forecast_and_reference_error_from_values(score_flag, date, variable, grid, time_flag, domain, box_sizes, pval, write2file=write_intermediate)
+else:
+    # the next dates are read on background threads while the current one is reduced
+    filenames_verification = [path_in_verification + variable + '_' + grid + '_' + date + '.nc' for date in forecast_dates]
+    filenames_forecast     = [path_in_forecast + variable + '_' + grid + '_' + date + '.nc' for date in forecast_dates]
+    pairs                  = verify.iter_forecast_verification_pairs(filenames_verification, filenames_forecast, variable, box_sizes, grid, prefetch=prefetch)
+    for  i, (forecast, verification) in enumerate(pairs):
+        print('forecast date: ' + forecast_dates[i])
+        forecast_error[i, ...], reference_error[i, ...] = verify.calc_forecast_and_reference_error_from_pair(score_flag, forecast, verification, pval)
       
-# calc score with bootstraping over all forecasts  
-score[:,:], score_bootstrap[:,:,:] = verify.calc_score_bootstrap(reference_error, forecast_error, number_bootstrap, box_sizes)
-
-# calculate significance of score (95%)            
-sig[:,:] = s2s.calc_significant_values_using_bootstrap(score_bootstrap,0.05)
+# calc score with bootstraping over all forecasts and significance of score (95%).
+# Only the smallest bootstrapped scores are kept unless store_bootstrap.
+score[:,:], sig[:,:], score_bootstrap_values = verify.calc_score_significance(reference_error, forecast_error, number_bootstrap, box_sizes, threshold=0.05, store_bootstrap=store_bootstrap)
+if store_bootstrap: score_bootstrap[:,:,:] = score_bootstrap_values
+else: score_bootstrap = None
 
 # write to fss and errors to file
 verify.write_score_to_file(score, score_bootstrap, sig, forecast_error, reference_error, write2file, grid, box_sizes, filename_out, path_out)
@@ -39,6 +39,8 @@ box_size                 = 1                       # smoothing box size in grid
 lead_time                = 5
 number_bootstrap         = 10000                   # number of times to shuffle initialization dates for error bars
 pval                     = 0.9
+workers                  = 8                       # number of threads for bootstrapping
+prefetch                 = 2                       # number of forecast dates read ahead on background threads (0 = no prefetching)
 write2file               = True
 # -----------------------------------------------------
 
@@ -61,22 +63,22 @@ path_out      = config.dirs['verify']
 dim           = verify.get_data_dimensions(grid, time_flag, domain)
 
 # initialize output arrays
-[score,score_bootstrap,sig] = verify.initialize_misc_xy_array(score_flag,dim,number_bootstrap)
+[score,score_bootstrap,sig] = verify.initialize_misc_xy_array(score_flag,dim,0) # bootstrapped scores are not stored
 forecast_error              = verify.initialize_error_xy_array(dim,forecast_dates)
 reference_error             = verify.initialize_error_xy_array(dim,forecast_dates)
 
-# loop over forecast dates
-for  i, date in enumerate(forecast_dates):
-    print('forecast date: ' + date)
-    filename_verification                           = path_in_verification + variable + '_' + grid + '_' + date + '.nc'
-    filename_forecast                               = path_in_forecast + variable + '_' + grid + '_' + date + '.nc'
-    forecast_error[i, ...], reference_error[i, ...] = verify.calc_forecast_and_reference_error_xy(score_flag,filename_verification,filename_forecast,variable,box_size,lead_time,pval)
-
-# calc fss with bootstraping over all forecasts  
-score[:,:], score_bootstrap[:,:,:] = verify.calc_score_bootstrap_xy(reference_error, forecast_error, number_bootstrap)
-
-# calculate significance of score (95%)                                                                                                                                                                                                      
-sig[:,:] = s2s.calc_significant_values_using_bootstrap(score_bootstrap,0.05)
+# loop over forecast dates, the next dates are read on background threads
+# while the current one is reduced
+filenames_verification = [path_in_verification + variable + '_' + grid + '_' + date + '.nc' for date in forecast_dates]
+filenames_forecast     = [path_in_forecast + variable + '_' + grid + '_' + date + '.nc' for date in forecast_dates]
+pairs                  = verify.iter_forecast_verification_pairs(filenames_verification, filenames_forecast, variable, box_size, grid, lead_time=lead_time, prefetch=prefetch)
+for  i, (forecast, verification) in enumerate(pairs):
+    print('forecast date: ' + forecast_dates[i])
+    forecast_error[i, ...], reference_error[i, ...] = verify.calc_forecast_and_reference_error_xy_from_pair(score_flag, forecast, verification, pval)
+
+# calc fss with bootstraping over all forecasts and significance of score (95%).
+# Only the smallest bootstrapped scores are kept at each gridpoint.
+score[:,:], sig[:,:] = verify.calc_score_significance_xy(reference_error, forecast_error, number_bootstrap, threshold=0.05, workers=workers)
 
 # write to fss and errors to file
 verify.write_score_to_file_xy(score, sig, write2file, filename_out, path_out)
@@ -6,5 +6,9 @@ setup(
     author = "Etienne Dunn-Sigouin",
     packages=['Dunnsigouin_etal_2025'],
     install_requires=["numpy","xarray","scipy"],
+    extras_require={
+        "store": ["zarr>=3","dask","fsspec","kerchunk","h5py"],
+        "test": ["pytest","netcdf4","zarr>=3","dask","fsspec","kerchunk","h5py"],
+    },
 )
 
@@ -0,0 +1,102 @@
+"""
+Tests of the vectorized and streaming bootstrap of the skill scores in verify.py
+"""
+
+import numpy  as np
+import xarray as xr
+from Dunnsigouin_etal_2025 import s2s, verify
+
+
+def get_errors(number_forecasts=40, seed=0):
+    """
+    (forecast_dates, box_size, time) forecast and reference errors with
+    scores around zero so that some are significant and some are not.
+    """
+    rng       = np.random.default_rng(seed)
+    box_sizes = np.array([1, 3, 5])
+    coords    = dict(forecast_dates=np.arange(number_forecasts), box_size=box_sizes, time=np.arange(1, 7))
+    dims      = ['forecast_dates', 'box_size', 'time']
+    shape     = (number_forecasts, box_sizes.size, 6)
+    reference = rng.gamma(2.0, size=shape)
+    forecast  = reference * rng.uniform(0.3, 1.6, size=(1,) + shape[1:]) * rng.gamma(4.0, 0.25, size=shape)
+    return xr.DataArray(reference, coords=coords, dims=dims), xr.DataArray(forecast, coords=coords, dims=dims), box_sizes
+
+
+def test_bootstrap_counts_are_resamples_with_replacement():
+    np.random.seed(0)
+    counts = verify.calc_bootstrap_counts(25, 300)
+    assert counts.shape == (300, 25)
+    np.testing.assert_array_equal(counts.sum(axis=1), 25)
+    assert np.all(counts == np.round(counts)) and np.all(counts >= 0)
+
+
+def test_score_bootstrap_batch_matches_loop_over_resamples():
+    reference_error, forecast_error, box_sizes = get_errors()
+    number_forecasts = forecast_error['forecast_dates'].size
+    number_bootstrap = 50
+    reference_mse    = reference_error.mean(dim='forecast_dates').values
+    error            = forecast_error.values.astype(np.float32).reshape(number_forecasts, -1)
+
+    np.random.seed(1)
+    counts = verify.calc_bootstrap_counts(number_forecasts, number_bootstrap)
+    np.random.seed(1)
+    result = verify.calc_score_bootstrap_batch(error, reference_mse, number_bootstrap)
+
+    # same resamples as the isel loop of calc_score_bootstrap(method='loop')
+    for i in range(number_bootstrap):
+        sampled_indices = np.repeat(np.arange(number_forecasts), counts[i].astype(int))
+        expected        = 1.0 - forecast_error.isel(forecast_dates=sampled_indices).mean(dim='forecast_dates') / reference_mse
+        np.testing.assert_allclose(result[i], expected.values, rtol=0, atol=1e-5) # float32 matrix product
+
+
+def test_score_significance_matches_full_bootstrap():
+    reference_error, forecast_error, box_sizes = get_errors()
+    number_bootstrap = 1000
+
+    np.random.seed(2)
+    score, score_bootstrap = verify.calc_score_bootstrap(reference_error, forecast_error, number_bootstrap, box_sizes, batch_size=100)
+    score_bootstrap        = xr.DataArray(score_bootstrap.astype(np.float32), dims=['box_size', 'time', 'number_bootstrap'])
+    sig                    = s2s.calc_significant_values_using_bootstrap(score_bootstrap, 0.05)
+
+    for store_bootstrap in [False, True]:
+        np.random.seed(2)
+        result_score, result_sig, result_bootstrap = verify.calc_score_significance(reference_error, forecast_error, number_bootstrap, box_sizes, batch_size=100, store_bootstrap=store_bootstrap)
+        np.testing.assert_allclose(result_score, score, rtol=1e-12)
+        np.testing.assert_array_equal(result_sig, sig.values)
+        assert np.isnan(result_sig).any() and not np.isnan(result_sig).all()
+        if store_bootstrap: np.testing.assert_array_equal(result_bootstrap, score_bootstrap.values)
+        else: assert result_bootstrap is None
+
+
+def get_errors_xy(number_forecasts=40, seed=0):
+    rng       = np.random.default_rng(seed)
+    coords    = dict(forecast_dates=np.arange(number_forecasts), latitude=np.linspace(50, 60, 5), longitude=np.arange(6.0))
+    dims      = ['forecast_dates', 'latitude', 'longitude']
+    shape     = (number_forecasts, 5, 6)
+    reference = rng.gamma(2.0, size=shape)
+    forecast  = reference * rng.uniform(0.3, 1.6, size=(1,) + shape[1:]) * rng.gamma(4.0, 0.25, size=shape)
+    return xr.DataArray(reference, coords=coords, dims=dims), xr.DataArray(forecast, coords=coords, dims=dims)
+
+
+def test_score_significance_xy_is_reproducible_and_independent_of_workers():
+    reference_error, forecast_error = get_errors_xy()
+    number_bootstrap                = 1000
+
+    results = []
+    for workers in [1, 4]:
+        np.random.seed(3)
+        results.append(verify.calc_score_significance_xy(reference_error, forecast_error, number_bootstrap, batch_size=100, workers=workers))
+        results.append(verify.calc_score_significance_xy(reference_error, forecast_error, number_bootstrap, batch_size=100, workers=workers, seed=5))
+    for score, sig in results[2:]:
+        np.testing.assert_array_equal(score, results[0][0])
+    np.testing.assert_array_equal(results[0][1], results[2][1])
+    np.testing.assert_array_equal(results[1][1], results[3][1])
+
+    # same as the full bootstrap over the same per-batch generators
+    error           = forecast_error.values.astype(np.float32).reshape(forecast_error['forecast_dates'].size, -1)
+    reference_mse   = reference_error.mean(dim='forecast_dates').values
+    generators      = verify.get_bootstrap_generators(10, seed=5)
+    score_bootstrap = np.concatenate([verify.calc_score_bootstrap_batch(error, reference_mse, 100, rng).astype(np.float32) for rng in generators])
+    score_bootstrap = xr.DataArray(score_bootstrap, dims=['number_bootstrap', 'latitude', 'longitude'])
+    sig             = s2s.calc_significant_values_using_bootstrap(score_bootstrap, 0.05)
+    np.testing.assert_array_equal(results[1][1], sig.values)
@@ -0,0 +1,64 @@
+"""
+Tests of the searchsorted extreme forecast index in verify.py against the
+loop over quantiles of the figure 6 scripts
+"""
+
+import numpy  as np
+import xarray as xr
+from Dunnsigouin_etal_2025 import verify
+
+
+def calc_efi_loop(forecast, hindcast, dq):
+    """
+    Extreme forecast index of one box size as in the figure 6 scripts before
+    verify.extreme_forecast_index, forecast (number, time, lat, lon) and
+    hindcast (sample, time, lat, lon).
+    """
+    q  = np.arange(dq, 1.0, dq)
+    qx = np.quantile(hindcast, q, axis=0)
+    fq = np.zeros(qx.shape)
+    for i in range(q.size):
+        fq[i,:] = (forecast < qx[i,:]).sum(axis=0) / forecast.shape[0]
+    q = q[:, np.newaxis, np.newaxis, np.newaxis]
+    return (2 / np.pi) * np.sum((q - fq) / np.sqrt(q * (1 - q)) * dq, axis=0)
+
+
+def test_searchsorted_quantile_table():
+    rng    = np.random.default_rng(0)
+    table  = np.sort(rng.integers(0, 5, size=(7, 4, 3)).astype(np.float32), axis=0) # ties
+    values = rng.integers(-1, 6, size=(4, 3)).astype(np.float32)
+    count  = verify.searchsorted_quantile_table(table, values).reshape(values.shape)
+    for i, j in np.ndindex(values.shape):
+        assert count[i,j] == np.searchsorted(table[:,i,j], values[i,j], side='right')
+
+
+def test_calc_efi_values():
+    rng      = np.random.default_rng(1)
+    hindcast = rng.gamma(2.0, size=(60, 3, 4, 5)).astype(np.float32)
+    forecast = rng.gamma(2.5, size=(11, 3, 4, 5)).astype(np.float32)
+    for dq in [0.01, 0.05]:
+        q, weights = verify.get_efi_weights(dq)
+        efi        = verify.calc_efi_values(forecast, hindcast, q, weights)
+        np.testing.assert_allclose(efi, calc_efi_loop(forecast, hindcast, dq), rtol=0, atol=1e-5)
+
+
+def test_extreme_forecast_index():
+    rng    = np.random.default_rng(2)
+    coords = dict(box_size=[1, 3], time=np.arange(3), latitude=np.arange(4.0), longitude=np.arange(5.0))
+    dims   = ['box_size', 'time', 'latitude', 'longitude']
+
+    # s2s: hindcast (box_size, hdate, number, ...) against ensemble forecast
+    hindcast = xr.DataArray(rng.normal(size=(2, 20, 3, 3, 4, 5)), coords=coords, dims=dims[:1] + ['hdate', 'number'] + dims[1:])
+    forecast = xr.DataArray(rng.normal(0.5, size=(2, 3, 4, 5, 11)), coords=dict(coords, number=np.arange(11)), dims=dims + ['number'])
+    efi      = verify.extreme_forecast_index(forecast, hindcast, workers=2)
+    for bs in range(2):
+        hindcast_values = hindcast[bs].values.reshape((-1, 3, 4, 5))
+        forecast_values = forecast[bs].transpose('number', ...).values
+        np.testing.assert_allclose(efi[bs], calc_efi_loop(forecast_values, hindcast_values, 0.01), rtol=0, atol=1e-5)
+
+    # era5: single member forecast
+    hindcast = xr.DataArray(rng.normal(size=(2, 20, 3, 4, 5)), coords=coords, dims=dims[:1] + ['hdate'] + dims[1:])
+    forecast = xr.DataArray(rng.normal(size=(2, 3, 4, 5)), coords=coords, dims=dims)
+    efi      = verify.extreme_forecast_index(forecast, hindcast)
+    for bs in range(2):
+        np.testing.assert_allclose(efi[bs], calc_efi_loop(forecast[bs].values[None], hindcast[bs].values, 0.01), rtol=0, atol=1e-5)
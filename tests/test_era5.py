@@ -0,0 +1,60 @@
+"""
+Tests of the memory-mapped era5 daily store in era5.py against reading the
+yearly files
+"""
+
+import numpy  as np
+import pandas as pd
+import xarray as xr
+import pytest
+from Dunnsigouin_etal_2025 import config, era5
+
+variable = 't2m24'
+grid     = '0.5x0.5'
+
+
+@pytest.fixture
+def yearly_files(tmp_path, monkeypatch):
+    """
+    Two synthetic yearly files of daily era5 data (2019 and leap year 2020),
+    with config.dirs pointing to tmp_path. Returns their filenames.
+    """
+    monkeypatch.setitem(config.dirs, 'era5_daily', str(tmp_path / 'era5_daily') + '/')
+    monkeypatch.setitem(config.dirs, 'era5_daily_store', str(tmp_path / 'era5_daily_store') + '/')
+    monkeypatch.setattr(era5, 'stores', {})
+    (tmp_path / 'era5_daily' / variable).mkdir(parents=True)
+
+    rng       = np.random.default_rng(0)
+    filenames = []
+    for year in [2019, 2020]:
+        time     = pd.date_range(str(year) + '-01-01', str(year) + '-12-31', freq='D')
+        coords   = dict(time=time, latitude=np.linspace(60, 50, 5), longitude=np.linspace(0, 10, 6))
+        da       = xr.DataArray(rng.normal(280, 10, size=(time.size, 5, 6)).astype('float32'), coords=coords, dims=list(coords), name=variable, attrs=dict(units='K'))
+        filename = config.dirs['era5_daily'] + variable + '/' + variable + '_' + grid + '_' + str(year) + '.nc'
+        da.to_netcdf(filename)
+        filenames.append(filename)
+    return filenames
+
+
+def test_era5_window_matches_yearly_files(yearly_files):
+    era5.write_era5_daily_store(variable, grid, [2019, 2020])
+    with xr.open_mfdataset(yearly_files) as ds:
+        for start, ndays in [('2019-01-01', 1), ('2019-12-10', 46), ('2020-02-20', 15), ('2020-11-16', 46)]:
+            for store_grid in [grid, 'day1to46_0.5x0.5']:
+                window   = era5.era5_window(variable, store_grid, start, ndays)
+                expected = ds[variable].sel(time=pd.date_range(start, periods=ndays)).load()
+                xr.testing.assert_identical(window, expected)
+                assert not window.values.flags.owndata # view of the memory map
+
+
+def test_era5_window_out_of_range(yearly_files):
+    era5.write_era5_daily_store(variable, grid, [2019, 2020])
+    for start, ndays in [('2018-12-31', 2), ('2020-11-17', 46), ('2021-01-01', 1)]:
+        with pytest.raises(ValueError):
+            era5.era5_window(variable, grid, start, ndays)
+    era5.era5_window(variable, grid, '2020-11-16', 46) # last full window
+
+
+def test_write_era5_daily_store_needs_continuous_days(yearly_files):
+    with pytest.raises(ValueError):
+        era5.write_era5_daily_store(variable, grid, [2020, 2019])
@@ -0,0 +1,33 @@
+"""
+Tests of the difference-first fmsess error terms in verify.py
+"""
+
+import numpy  as np
+import xarray as xr
+import pytest
+from Dunnsigouin_etal_2025 import misc, verify
+
+
+def get_anomaly(seed):
+    rng    = np.random.default_rng(seed)
+    coords = dict(latitude=np.linspace(50, 60, 8), longitude=np.arange(9.0))
+    return xr.DataArray(rng.normal(size=(4, 8, 9)), dims=['time', 'latitude', 'longitude'], coords=coords)
+
+
+def test_fmsess_error_from_anomaly_matches_smoothed_fields():
+    forecast, verification = get_anomaly(0), get_anomaly(1)
+    box_sizes              = np.array([1, 3, 5])
+
+    forecast_smooth     = verify.boxcar_smoother_xy_optimized(box_sizes, forecast, 'xarray')
+    verification_smooth = verify.boxcar_smoother_xy_optimized(box_sizes, verification, 'xarray')
+    forecast_error_xy, reference_error_xy = verify.calc_error_terms_xy('fmsess', forecast_smooth, verification_smooth)
+
+    for method in ['uniform_filter', 'summed_area_table']:
+        forecast_error, reference_error = verify.calc_fmsess_error_from_anomaly(forecast, verification, box_sizes, method=method)
+        np.testing.assert_allclose(forecast_error, misc.xy_mean(forecast_error_xy).values, rtol=1e-12)
+        np.testing.assert_allclose(reference_error, misc.xy_mean(reference_error_xy).values, rtol=1e-12)
+
+
+def test_fmsess_error_from_anomaly_rejects_low_resolution_grid():
+    with pytest.raises(ValueError):
+        verify.calc_fmsess_error_from_anomaly(get_anomaly(0), get_anomaly(1), np.array([1, 3]), grid='0.5x0.5')
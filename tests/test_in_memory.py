@@ -0,0 +1,85 @@
+"""
+Tests that the in-memory scoring pipeline of verify.py gives the same errors
+as scoring the smoothed anomaly or probability/binary files
+"""
+
+import types
+import numpy  as np
+import pandas as pd
+import xarray as xr
+import pytest
+from Dunnsigouin_etal_2025 import config, verify
+
+variable  = 'tp24'
+grid      = '0.25x0.25'
+domain    = 'europe'
+date      = '2020-01-02'
+box_sizes = np.array([1, 3, 5])
+pval      = 0.9
+
+
+@pytest.fixture
+def daily_values(tmp_path, monkeypatch):
+    """
+    Small synthetic daily s2s and era5 forecast and hindcast format files,
+    with config.dirs pointing to tmp_path and a matching small domain.
+    """
+    rng       = np.random.default_rng(0)
+    latitude  = np.linspace(60, 50, 8)
+    longitude = np.linspace(0, 10, 9)
+    time      = pd.date_range(date, periods=5)
+    hdate     = np.arange(10)
+    number    = np.arange(11)
+
+    for key in config.dirs:
+        monkeypatch.setitem(config.dirs, key, str(tmp_path / key) + '/')
+    monkeypatch.setattr(verify, 'get_data_dimensions', lambda grid, time_flag, domain: types.SimpleNamespace(latitude=latitude, longitude=longitude))
+
+    fields = {'s2s_forecast_daily':(['time','number'], dict(time=time, number=number)),
+              's2s_hindcast_daily':(['time','hdate','number'], dict(time=time, hdate=hdate, number=number)),
+              'era5_forecast_daily':(['time'], dict(time=time)),
+              'era5_hindcast_daily':(['time','hdate'], dict(time=time, hdate=hdate))}
+    for key, (dims, coords) in fields.items():
+        coords = dict(coords, latitude=latitude, longitude=longitude)
+        shape  = [len(coords[dim]) for dim in dims] + [latitude.size, longitude.size]
+        da     = xr.DataArray(rng.gamma(1.0, size=shape).astype('float32'), dims=dims + ['latitude','longitude'], coords=coords, name=variable)
+        path   = tmp_path / key / variable
+        path.mkdir(parents=True)
+        da.to_netcdf(path / (variable + '_' + grid + '_' + date + '.nc'))
+
+    for product in ['s2s_forecast_daily_anomaly', 'era5_forecast_daily_anomaly']:
+        (tmp_path / product / domain / variable).mkdir(parents=True)
+    for product in ['s2s_forecast_daily_probability', 'era5_forecast_daily_binary']:
+        (tmp_path / (product + str(pval)) / domain / variable).mkdir(parents=True)
+        monkeypatch.setitem(config.dirs, product, str(tmp_path / product))
+
+    return tmp_path
+
+
+@pytest.mark.parametrize('score_type, product_forecast, product_verification, rtol', [
+    ('fmsess', 's2s_forecast_daily_anomaly', 'era5_forecast_daily_anomaly', 1e-3), # files are packed to int16
+    ('fbss', 's2s_forecast_daily_probability' + str(pval), 'era5_forecast_daily_binary' + str(pval), 1e-6)])
+def test_in_memory_errors_match_errors_from_files(daily_values, score_type, product_forecast, product_verification, rtol):
+    forecast_error, reference_error = verify.calc_forecast_and_reference_error_from_values(score_type, date, variable, grid, 'daily', domain, box_sizes, pval)
+
+    # write the smoothed files, then score them as calc-score-s2s-forecast.py does
+    written = verify.calc_forecast_and_reference_error_from_values(score_type, date, variable, grid, 'daily', domain, box_sizes, pval, write2file=True)
+    np.testing.assert_allclose(written[0], forecast_error, rtol=1e-5)
+    np.testing.assert_allclose(written[1], reference_error, rtol=1e-5)
+
+    filename              = variable + '_' + grid + '_' + date + '.nc'
+    filename_forecast     = str(daily_values / product_forecast / domain / variable / filename)
+    filename_verification = str(daily_values / product_verification / domain / variable / filename)
+    from_files            = verify.calc_forecast_and_reference_error(score_type, filename_verification, filename_forecast, variable, box_sizes, grid, pval)
+    np.testing.assert_allclose(from_files[0], forecast_error, rtol=rtol)
+    np.testing.assert_allclose(from_files[1], reference_error, rtol=rtol)
+
+    # same metadata as the process scripts
+    with xr.open_dataset(filename_forecast) as ds:
+        product = 'anomaly' if score_type == 'fmsess' else 'probability'
+        assert (ds[variable].attrs['units'], ds[variable].attrs['long_name']) == verify.product_attrs[product][variable]
+
+
+def test_in_memory_rejects_low_resolution_grid():
+    with pytest.raises(ValueError):
+        verify.calc_forecast_and_reference_error_from_values('fmsess', date, variable, '0.5x0.5', 'daily', domain, box_sizes, pval)
@@ -0,0 +1,82 @@
+"""
+Tests of the vectorized lead time gained in verify.py against the loop over
+box sizes and times it replaced
+"""
+
+import numpy  as np
+import xarray as xr
+from Dunnsigouin_etal_2025 import verify
+
+
+def calc_lead_time_gained_loop(filename, dt):
+    """
+    verify.calc_lead_time_gained before the isoline search was vectorized.
+    """
+    ds    = xr.open_dataset(filename)
+    score = ds['score']
+    sig   = ds['significance']
+    ds.close()
+
+    time         = score.time.values
+    time_interp  = np.linspace(time[0],time[-1],int((time[-1]-time[0])/dt+1.0))
+    score_interp = score.interp(time=time_interp).values
+    box_size     = score.box_size
+
+    lead_time_gained = np.zeros(score_interp.shape)
+    for bs in range(1,box_size.size):
+        for t in range(0,time_interp.size):
+            index = np.nanargmin(np.absolute(score_interp[bs,t] - score_interp[0,:]))
+            if time_interp[index] == 1.0:
+                lead_time_gained[bs,t] = np.nan
+            else:
+                lead_time_gained[bs,t] = time_interp[t] - time_interp[index]
+
+    max_skill_mask         = np.zeros(lead_time_gained.shape)
+    index1                 = np.where(np.isnan(lead_time_gained))
+    index2                 = np.where(~np.isnan(lead_time_gained))
+    max_skill_mask[index2] = np.nan
+    max_skill_mask[index1] = 1.0
+
+    for bs in range(0,box_size.size):
+        index1 = time[np.where(sig[bs,:] == 1.0)[0]]
+        if index1.size > 0:
+            index2                       = np.where(time_interp == index1[0])[0][0] - int(((time[1]-time[0])/dt)/2) + 1
+            lead_time_gained[bs,index2:] = np.nan
+
+    return lead_time_gained, max_skill_mask
+
+
+def get_score(seed=0):
+    """
+    Skill decreasing with lead time and increasing with box size, with noise
+    and non-significant times at long leads for some box sizes.
+    """
+    rng          = np.random.default_rng(seed)
+    box_size     = np.arange(1, 20, 2)
+    time         = np.arange(1, 16)
+    score        = 0.8 * np.exp(-time[None, :] / (3.0 + 0.4 * box_size[:, None])) + rng.normal(0, 0.02, size=(box_size.size, time.size))
+    significance = np.full(score.shape, np.nan)
+    significance[:3, 10:] = 1.0
+    significance[5, 12:]  = 1.0
+    coords = dict(box_size=box_size, time=time)
+    return xr.Dataset(dict(score=(('box_size', 'time'), score), significance=(('box_size', 'time'), significance)), coords=coords)
+
+
+def test_calc_lead_time_gained(tmp_path):
+    for seed in range(3):
+        filename = str(tmp_path / ('score_' + str(seed) + '.nc'))
+        get_score(seed).to_netcdf(filename)
+        for dt in [1.0, 0.25]:
+            lead_time_gained, max_skill_mask = verify.calc_lead_time_gained(filename, dt)
+            expected                         = calc_lead_time_gained_loop(filename, dt)
+            np.testing.assert_array_equal(lead_time_gained, expected[0])
+            np.testing.assert_array_equal(max_skill_mask, expected[1])
+            assert np.isnan(expected[0]).any() and (expected[0] > 0).any()
+
+
+def test_calc_lead_time_gained_from_score_leading_dims():
+    time_interp  = np.linspace(1, 15, 57)
+    score_interp = np.stack([get_score(seed)['score'].interp(time=time_interp).values for seed in range(4)])
+    result       = verify.calc_lead_time_gained_from_score(score_interp, time_interp)
+    for i in range(4):
+        np.testing.assert_array_equal(result[i], verify.calc_lead_time_gained_from_score(score_interp[i], time_interp))
@@ -0,0 +1,41 @@
+"""
+Tests of the compressed netcdf writers in misc.py
+"""
+
+import numpy  as np
+import xarray as xr
+from Dunnsigouin_etal_2025 import misc
+
+
+def get_dataset(seed=0):
+    rng    = np.random.default_rng(seed)
+    values = rng.normal(280, 10, size=(6, 5, 4)).astype(np.float32)
+    values[0] = np.nan
+    values[2, 1, 1] = np.nan
+    coords = dict(time=np.arange(6), latitude=np.arange(5.0), longitude=np.arange(4.0))
+    return xr.Dataset(dict(t2m=xr.DataArray(values, coords=coords, dims=list(coords), attrs=dict(units='K'))))
+
+
+def test_calc_nanmin_nanmax_blockwise():
+    da = get_dataset()['t2m']
+    for block_size in [1, 7, 20, 2**22]:
+        assert misc.calc_nanmin_nanmax_blockwise(da, block_size) == (float(np.nanmin(da)), float(np.nanmax(da)))
+    assert np.isnan(misc.calc_nanmin_nanmax_blockwise(da[:1])).all()
+
+
+def test_to_netcdf_with_packing_and_compression_from_lazy_file(tmp_path):
+    ds = get_dataset()
+    misc.to_netcdf_with_compression(ds, 5, str(tmp_path) + '/', 'raw.nc')
+    with xr.open_dataset(tmp_path / 'raw.nc') as ds_lazy:
+        assert ds_lazy['t2m'].variable._in_memory is False
+        misc.to_netcdf_with_packing_and_compression(ds_lazy, str(tmp_path / 'packed.nc'), chunksizes=dict(time=1))
+        assert ds_lazy['t2m'].variable._in_memory is False
+    with xr.open_dataset(tmp_path / 'raw.nc') as ds_raw:
+        xr.testing.assert_identical(ds_raw, ds)
+        assert ds_raw['t2m'].encoding['shuffle'] # netcdf4 backend default, as nccopy -s
+    with xr.open_dataset(tmp_path / 'packed.nc') as ds_packed:
+        assert ds_packed['t2m'].encoding['dtype'] == np.int16
+        assert ds_packed['t2m'].encoding['chunksizes'] == (1, 5, 4)
+        scale_factor = ds_packed['t2m'].encoding['scale_factor']
+        np.testing.assert_allclose(ds_packed['t2m'], ds['t2m'], rtol=0, atol=scale_factor)
+        assert np.array_equal(np.isnan(ds_packed['t2m']), np.isnan(ds['t2m']))
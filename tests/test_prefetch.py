@@ -0,0 +1,44 @@
+"""
+Tests of the prefetching reader of forecast/verification file pairs in verify.py
+"""
+
+import numpy  as np
+import pandas as pd
+import xarray as xr
+import pytest
+from Dunnsigouin_etal_2025 import verify
+
+variable  = 'tp24'
+grid      = '0.25x0.25'
+box_sizes = np.array([1, 3, 5])
+
+
+@pytest.fixture
+def filenames(tmp_path):
+    """
+    Seven anomaly file pairs, more than any prefetch below but the largest,
+    each with its own valid dates and values.
+    """
+    rng                    = np.random.default_rng(0)
+    filenames_verification = []
+    filenames_forecast     = []
+    for date in pd.date_range('2020-01-02', periods=7, freq='7D'):
+        coords = dict(box_size=box_sizes, time=pd.date_range(date, periods=4), latitude=np.linspace(60, 50, 5), longitude=np.linspace(0, 10, 6))
+        for product, filenames_product in [('verification', filenames_verification), ('forecast', filenames_forecast)]:
+            da       = xr.DataArray(rng.normal(size=(3, 4, 5, 6)), coords=coords, dims=list(coords), name=variable)
+            filename = str(tmp_path / (product + '_' + date.strftime('%Y-%m-%d') + '.nc'))
+            da.to_netcdf(filename)
+            filenames_product.append(filename)
+    return filenames_verification, filenames_forecast
+
+
+@pytest.mark.parametrize('lead_time', [None, 2])
+def test_prefetch_yields_pairs_in_order(filenames, lead_time):
+    filenames_verification, filenames_forecast = filenames
+    expected = [verify.read_forecast_verification_pair(*pair, variable, box_sizes[1:], grid, lead_time) for pair in zip(filenames_verification, filenames_forecast)]
+    for prefetch in [0, 1, 3, 10]:
+        pairs = list(verify.iter_forecast_verification_pairs(filenames_verification, filenames_forecast, variable, box_sizes[1:], grid, lead_time, prefetch=prefetch))
+        assert len(pairs) == len(expected)
+        for (forecast, verification), (forecast_expected, verification_expected) in zip(pairs, expected):
+            xr.testing.assert_identical(forecast, forecast_expected)
+            xr.testing.assert_identical(verification, verification_expected)
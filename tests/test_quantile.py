@@ -0,0 +1,46 @@
+"""
+Tests of the partition-based quantiles in verify.py against np.quantile
+"""
+
+import numpy  as np
+import xarray as xr
+from Dunnsigouin_etal_2025 import verify
+
+
+def test_sample_quantile():
+    rng = np.random.default_rng(0)
+    for dtype in [np.float32, np.float64]:
+        for number_samples in [1, 2, 11, 60]:
+            values = rng.normal(size=(3, number_samples, 4)).astype(dtype)
+            values[:, :number_samples // 2, 0] = 0.5 # ties
+            for pvals in [0.1, 0.5, 0.9, [0.1, 0.9], [0.9, 0.1, 0.5, 0.33]]:
+                for axis in [1, -2]:
+                    original = values.copy()
+                    quantile = verify.sample_quantile(values, pvals, axis=axis)
+                    expected = np.stack([np.quantile(values, pval, axis=axis) for pval in np.atleast_1d(pvals).tolist()]) # np.quantile promotes float32 for array pvals
+                    np.testing.assert_array_equal(quantile, expected if np.ndim(pvals) else expected[0])
+                    assert quantile.dtype == dtype
+                    np.testing.assert_array_equal(values, original)
+
+
+def test_sample_quantile_overwrite_input():
+    rng      = np.random.default_rng(1)
+    values   = rng.normal(size=(5, 6, 40))
+    expected = np.quantile(values, [0.1, 0.9], axis=-1)
+    np.testing.assert_array_equal(verify.sample_quantile(values, [0.1, 0.9], axis=-1, overwrite_input=True), expected)
+
+
+def test_calc_hindcast_quantile():
+    rng      = np.random.default_rng(2)
+    coords   = dict(time=np.arange(3), hdate=np.arange(20), number=np.arange(11), latitude=np.arange(4.0), longitude=np.arange(5.0))
+    hindcast = xr.DataArray(rng.normal(size=(3, 20, 11, 4, 5)), coords=coords, dims=list(coords))
+    time     = np.arange(10, 13)
+    for da in [hindcast, hindcast.transpose('time', 'latitude', 'longitude', 'hdate', 'number'), hindcast.isel(number=0, drop=True)]:
+        original    = da.copy(deep=True)
+        sample_dims = [d for d in ('hdate', 'number') if d in da.dims]
+        values      = da.transpose('time', 'latitude', 'longitude', *sample_dims).values.reshape(3, 4, 5, -1)
+        for pval in [0.9, [0.1, 0.9]]:
+            quantile = verify.calc_hindcast_quantile(da, pval, time)
+            np.testing.assert_array_equal(quantile.values, np.quantile(values, pval, axis=-1))
+            np.testing.assert_array_equal(quantile['time'], time)
+        xr.testing.assert_identical(da, original)
@@ -0,0 +1,38 @@
+"""
+Tests of misc.resample_fixed_cadence against xarray resample
+"""
+
+import numpy  as np
+import pandas as pd
+import xarray as xr
+from Dunnsigouin_etal_2025 import misc
+
+
+def get_6hourly(start='2020-01-01 00:00', periods=4*5, seed=0):
+    rng    = np.random.default_rng(seed)
+    coords = dict(latitude=np.arange(3.0), time=pd.date_range(start, periods=periods, freq='6h'), longitude=np.arange(4.0))
+    values = rng.gamma(2.0, size=(3, periods, 4))
+    values[0, 2, 1] = np.nan
+    return xr.DataArray(values, coords=coords, dims=list(coords), name='tp', attrs=dict(units='m'))
+
+
+def test_resample_fixed_cadence_dataarray():
+    # full days, partial first and last day, single step bins
+    for start, periods, freq in [('2020-01-01 00:00', 20, '1D'), ('2020-01-01 12:00', 19, '1D'), ('2020-02-28 18:00', 9, '12h'), ('2020-01-01 00:00', 7, '6h')]:
+        da = get_6hourly(start, periods)
+        for how in ['sum', 'mean', 'max']:
+            result   = misc.resample_fixed_cadence(da, freq, how)
+            expected = getattr(da.resample(time=freq), how)('time')
+            xr.testing.assert_allclose(result, expected)
+            assert result.dims == da.dims and result.attrs == expected.attrs
+
+
+def test_resample_fixed_cadence_dataset():
+    ds = xr.Dataset(dict(tp=get_6hourly(), t2m=get_6hourly(seed=1).transpose('time', ...), lsm=xr.DataArray(np.ones(4), dims=['longitude'])))
+    for how in ['sum', 'mean']:
+        xr.testing.assert_allclose(misc.resample_fixed_cadence(ds, '1D', how), getattr(ds.resample(time='1D'), how)('time'))
+
+
+def test_resample_fixed_cadence_irregular():
+    da = get_6hourly().drop_isel(time=[5, 6])
+    xr.testing.assert_identical(misc.resample_fixed_cadence(da, '1D', 'sum'), da.resample(time='1D').sum('time'))
@@ -0,0 +1,72 @@
+"""
+Tests of the boxcar smoothers in verify.py
+"""
+
+import numpy  as np
+import xarray as xr
+from scipy    import ndimage
+from Dunnsigouin_etal_2025 import verify
+
+
+def get_field(nan=False):
+    rng    = np.random.default_rng(0)
+    values = rng.normal(size=(3, 20, 30))
+    if nan: values[1, 5, 7] = np.nan
+    return xr.DataArray(values, dims=['time', 'latitude', 'longitude'])
+
+
+def test_summed_area_table_matches_uniform_filter():
+    da        = get_field()
+    box_sizes = np.array([1, 2, 3, 5, 9])
+    expected  = verify.boxcar_smoother_xy_optimized(box_sizes, da, 'numpy', method='uniform_filter')
+    for workers in [1, 2]:
+        result = verify.boxcar_smoother_xy_optimized(box_sizes, da, 'numpy', method='summed_area_table', workers=workers)
+        np.testing.assert_allclose(result, expected, rtol=0, atol=1e-12)
+
+
+def test_summed_area_table_with_nans():
+    da        = get_field(nan=True)
+    box_sizes = np.array([1, 3, 5])
+    uniform   = verify.boxcar_smoother_xy_optimized(box_sizes, da, 'numpy', method='uniform_filter')
+    result    = verify.boxcar_smoother_xy_optimized(box_sizes, da, 'numpy', method='summed_area_table')
+
+    for i, size in enumerate(box_sizes):
+        filter_size = [1, size, size]
+
+        # nan exactly in the boxes containing the nan
+        box_has_nan = ndimage.uniform_filter(np.isnan(da.values).astype(float), size=filter_size, mode='constant') > 0
+        np.testing.assert_array_equal(np.isnan(result[i]), box_has_nan)
+
+        # same as uniform_filter wherever uniform_filter is valid, and as 
+        # uniform_filter of the field with the nan as zero elsewhere
+        valid = ~np.isnan(uniform[i])
+        np.testing.assert_allclose(result[i][valid], uniform[i][valid], rtol=0, atol=1e-12)
+        np.testing.assert_array_equal(np.isnan(uniform[i]) | ~box_has_nan, True)
+        zeroed = ndimage.uniform_filter(np.nan_to_num(da.values), size=filter_size, mode='constant')
+        np.testing.assert_allclose(result[i][~box_has_nan], zeroed[~box_has_nan], rtol=0, atol=1e-12)
+
+
+def test_iter_boxcar_smooth_matches_boxcar_smoother():
+    da        = get_field(nan=True)
+    box_sizes = np.array([1, 3, 5])
+    for method in ['uniform_filter', 'summed_area_table']:
+        expected = verify.boxcar_smoother_xy_optimized(box_sizes, da, 'numpy', method=method)
+        for i, (size, smooth) in enumerate(verify.iter_boxcar_smooth(da, box_sizes, 'numpy', method=method, workers=2)):
+            np.testing.assert_array_equal(smooth, expected[i])
+
+
+def test_summed_area_table_box_sums():
+    """
+    Box sums written into out blockwise, for 2d and 3d fields, float32 output
+    and boxes as large as or larger than the domain.
+    """
+    values = get_field().values[:, :7, :12]
+    for field in [values, values[0]]:
+        tables = verify.calc_summed_area_table(field)
+        for size in [1, 3, 7, 13, 25, 31]:
+            filter_size = [1] * (field.ndim - 2) + [size, size]
+            expected    = ndimage.uniform_filter(field, size=filter_size, mode='constant', cval=0.0)
+            for block_size in [1, 50, 2**22]:
+                out = np.zeros(field.shape, dtype=np.float32)
+                verify.boxcar_smoother_from_summed_area_table(tables, size, out, block_size)
+                np.testing.assert_allclose(out, expected, rtol=0, atol=1e-6)
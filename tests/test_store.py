@@ -0,0 +1,154 @@
+"""
+Tests that scoring from the zarr stores and kerchunk reference indexes of
+store.py gives the same errors as scoring the per-date netcdf files
+"""
+
+import os
+import numpy  as np
+import pandas as pd
+import xarray as xr
+import pytest
+from Dunnsigouin_etal_2025 import config, misc, store, verify
+
+pytest.importorskip('zarr')
+pytest.importorskip('dask')
+
+variable  = 'tp24'
+grid      = '0.25x0.25'
+domain    = 'europe'
+dates     = ['2020-01-02', '2020-01-06']
+box_sizes = np.array([1, 3, 5])
+pval      = 0.9
+
+
+def get_fields(date, seed):
+    """
+    Smoothed s2s and era5 anomaly, s2s probability (member counts) and era5
+    binary fields of one initialization date, keyed by product.
+    """
+    rng    = np.random.default_rng(seed)
+    coords = dict(box_size=box_sizes, time=pd.date_range(date, periods=5), latitude=np.linspace(60, 50, 8), longitude=np.linspace(0, 10, 9))
+    dims   = list(coords)
+    shape  = [len(coord) for coord in coords.values()]
+    fields = {}
+    for product in ['s2s_forecast_daily_anomaly', 'era5_forecast_daily_anomaly']:
+        fields[product] = xr.DataArray(rng.normal(size=shape).astype('float32'), coords=coords, dims=dims, name=variable)
+    fields['s2s_forecast_daily_probability'] = xr.DataArray(rng.integers(0, 12, size=shape).astype('uint8'), coords=coords, dims=dims, name=variable, attrs=dict(number=11))
+    fields['era5_forecast_daily_binary']     = xr.DataArray(rng.integers(0, 2, size=shape).astype('uint8'), coords=coords, dims=dims, name=variable)
+    return fields
+
+
+@pytest.fixture
+def products(tmp_path, monkeypatch):
+    """
+    Writes the fields of all dates to per-date netcdf files and appends them
+    to the zarr stores, with config.dirs pointing to tmp_path.
+    """
+    for key in config.dirs:
+        monkeypatch.setitem(config.dirs, key, str(tmp_path / key) + '/')
+    for product in ['s2s_forecast_daily_probability', 'era5_forecast_daily_binary']:
+        monkeypatch.setitem(config.dirs, product, str(tmp_path / product))
+
+    for i, date in enumerate(dates):
+        for product, da in get_fields(date, i).items():
+            product_pval = pval if product.endswith(('probability', 'binary')) else None
+            path         = store.get_product_path(product, domain, variable, product_pval)
+            os.makedirs(path, exist_ok=True)
+            da.to_netcdf(path + variable + '_' + grid + '_' + date + '.nc')
+            store.append_to_store(da, store.get_store_filename(product, domain, variable, grid, product_pval), date)
+    return tmp_path
+
+
+def get_filename(product, date, pval=None):
+    return store.get_product_path(product, domain, variable, pval) + variable + '_' + grid + '_' + date + '.nc'
+
+
+def calc_errors_from_files(score_type, product_forecast, product_verification, product_pval):
+    errors = [verify.calc_forecast_and_reference_error(score_type, get_filename(product_verification, date, product_pval),
+                                                       get_filename(product_forecast, date, product_pval), variable, box_sizes, grid, pval)
+              for date in dates]
+    return np.stack([error[0] for error in errors]), np.stack([error[1] for error in errors])
+
+
+@pytest.mark.parametrize('score_type, product_forecast, product_verification, product_pval', [
+    ('fmsess', 's2s_forecast_daily_anomaly', 'era5_forecast_daily_anomaly', None),
+    ('fbss', 's2s_forecast_daily_probability', 'era5_forecast_daily_binary', pval)])
+def test_store_matches_files(products, score_type, product_forecast, product_verification, product_pval):
+    store_forecast     = store.get_store_filename(product_forecast, domain, variable, grid, product_pval)
+    store_verification = store.get_store_filename(product_verification, domain, variable, grid, product_pval)
+
+    ds = store.open_store(store_forecast)
+    np.testing.assert_array_equal(ds['forecast_date'], pd.to_datetime(dates))
+    np.testing.assert_array_equal(ds['time'], np.arange(1, 6))
+    for i, date in enumerate(dates):
+        np.testing.assert_array_equal(ds['valid_time'][i], pd.date_range(date, periods=5))
+
+    forecast_error, reference_error = verify.calc_forecast_and_reference_error_from_store(score_type, store_verification, store_forecast, variable, box_sizes[1:], grid, dates, pval)
+    forecast_error_files, reference_error_files = calc_errors_from_files(score_type, product_forecast, product_verification, product_pval)
+    np.testing.assert_allclose(forecast_error, forecast_error_files[:, 1:], rtol=1e-6)
+    np.testing.assert_allclose(reference_error, reference_error_files[:, 1:], rtol=1e-6)
+
+
+@pytest.mark.parametrize('score_type, product_forecast, product_verification, product_pval', [
+    ('fmsess', 's2s_forecast_daily_anomaly', 'era5_forecast_daily_anomaly', None),
+    ('fbss', 's2s_forecast_daily_probability', 'era5_forecast_daily_binary', pval)])
+def test_reference_index_matches_files(products, score_type, product_forecast, product_verification, product_pval):
+    pytest.importorskip('kerchunk')
+    index_forecast     = store.build_reference_index(product_forecast, domain, variable, grid, product_pval)
+    index_verification = store.build_reference_index(product_verification, domain, variable, grid, product_pval)
+    assert store.build_reference_index(product_forecast, domain, variable, grid, product_pval) == index_forecast # from the references of each file
+
+    with store.open_store(index_forecast) as ds:
+        np.testing.assert_array_equal(ds['forecast_date'], pd.to_datetime(dates))
+        np.testing.assert_array_equal(ds['time'], np.arange(1, 6))
+        for i, date in enumerate(dates):
+            np.testing.assert_array_equal(ds['valid_time'][i], pd.date_range(date, periods=5))
+            np.testing.assert_array_equal(ds[variable][i], get_fields(date, i)[product_forecast])
+
+    forecast_error, reference_error = verify.calc_forecast_and_reference_error_from_store(score_type, index_verification, index_forecast, variable, box_sizes, grid, dates, pval)
+    forecast_error_files, reference_error_files = calc_errors_from_files(score_type, product_forecast, product_verification, product_pval)
+    np.testing.assert_allclose(forecast_error, forecast_error_files, rtol=1e-6)
+    np.testing.assert_allclose(reference_error, reference_error_files, rtol=1e-6)
+
+
+def test_append_to_store_overwrites_existing_date(products):
+    product  = 's2s_forecast_daily_anomaly'
+    filename = store.get_store_filename(product, domain, variable, grid)
+    da       = get_fields(dates[0], 10)[product]
+    store.append_to_store(da, filename, dates[0])
+
+    with store.open_store(filename) as ds:
+        assert ds['forecast_date'].size == len(dates)
+        np.testing.assert_array_equal(ds[variable].sel(forecast_date=dates[0]), da)
+        np.testing.assert_array_equal(ds[variable].sel(forecast_date=dates[1]), get_fields(dates[1], 1)[product])
+        np.testing.assert_array_equal(ds['valid_time'].sel(forecast_date=dates[0]), da['time'])
+
+
+@pytest.mark.parametrize('same_range', [False, True])
+def test_reference_index_of_packed_files(products, same_range):
+    """
+    Files packed by to_netcdf_with_packing_and_compression, as the process
+    scripts write them, each have their own scale_factor and add_offset
+    unless their values span the same range.
+    """
+    pytest.importorskip('kerchunk')
+    product = 's2s_forecast_daily_anomaly'
+    path    = store.get_product_path(product, 'norway', variable)
+    os.makedirs(path, exist_ok=True)
+    fields  = []
+    for i, date in enumerate(dates):
+        da = get_fields(date, i)[product]
+        if same_range: da[0, 0, 0, :2] = [-5.0, 5.0]
+        else: da = da * (i + 1)
+        misc.to_netcdf_with_packing_and_compression(da, path + variable + '_' + grid + '_' + date + '.nc', chunksizes=config.chunks['anomaly'])
+        fields.append(da)
+
+    if not same_range:
+        with pytest.raises(ValueError, match='packing'):
+            store.build_reference_index(product, 'norway', variable, grid)
+        return
+
+    with store.open_store(store.build_reference_index(product, 'norway', variable, grid)) as ds:
+        scale_factor = ds[variable].encoding['scale_factor']
+        for i, da in enumerate(fields):
+            np.testing.assert_allclose(ds[variable][i], da, rtol=0, atol=scale_factor)